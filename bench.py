@@ -0,0 +1,206 @@
+"""AdPeople 오프라인 벤치마크 — 로컬 가짜 Supabase REST / pcmap GraphQL 서버 + 실제 FastAPI 앱 부하 테스트
+
+    python bench.py --concurrency 32 --duration 20 --latency 80 --error-rate 0.05 --json bench.json
+    python bench.py --baseline bench.json      # 기준 대비 p95/RPS 회귀 검사 (실패 시 종료코드 1)
+
+가짜 서버 하나가 Supabase(/rest/v1/*), GraphQL(/graphql)를 흉내내고, 작은 TCP 프록시(CONNECT/절대 URL)가 프록시 포트 역할.
+main.py는 환경변수로 가짜 서버를 바라보게 한 뒤 같은 프로세스의 uvicorn으로 띄움."""
+import argparse, asyncio, json, os, random, resource, socket, statistics, sys, threading, time
+from urllib.parse import parse_qs
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1",0));return s.getsockname()[1]
+
+class Fake:
+    """가짜 Supabase + pcmap GraphQL (ASGI) — 지연(ms), 오류율, 빈 결과율, 페이지 크기 설정"""
+    def __init__(s,a):
+        s.a=a;s.db={"users":[{"id":1,"user_id":"bench","name":"벤치","role":"ADMIN","level":9,"password_hash":"x"}],"rank_history":[],"campaigns":[],"team_members":[],"notices":[],"revoked_tokens":[],"rank_subscriptions":[]}
+        s.db["sales"]=[{"id":i+1,"manager":f"m{i%7}","product_type":f"p{i%5}","sales_type":"월정액","company":f"c{i}","created_at":f"2026-{i%12+1:02d}-{i%28+1:02d}T00:00:00","billing":1000,"billing_vat":1100,"cost_vat":330,"margin":770} for i in range(a.rows)]
+        s.seq=a.rows+1;s.hits={"supabase":0,"graphql":0}
+    async def delay(s):
+        if s.a.latency:await asyncio.sleep(random.uniform(.5,1.5)*s.a.latency/1000)
+    def places(s,q,start,display):
+        tot=s.a.total
+        return [{"id":str(1000000+i),"name":f"{q} 업체{i}","tel":f"02-{i:04d}-{i%10000:04d}","category":"카페","address":"서울 강남구 역삼동 123","x":"127","y":"37","reviewCount":i*3,"blogCatalogReviewCount":i,"bookingReviewCount":0,"totalReviewCount":i*4,"virtualTel":""} for i in range(start-1,min(tot,start-1+display))]
+    async def __call__(s,scope,receive,send):
+        if scope["type"]=="lifespan":
+            while True:
+                m=await receive()
+                if m["type"]=="lifespan.startup":await send({"type":"lifespan.startup.complete"})
+                else:await send({"type":"lifespan.shutdown.complete"});return
+        body=b""
+        while True:
+            m=await receive();body+=m.get("body",b"")
+            if not m.get("more_body"):break
+        path=scope["path"];q={k:v[0] for k,v in parse_qs(scope["query_string"].decode()).items()}
+        await s.delay()
+        code,out,hdr=200,[],{}
+        # 로그인 조회(users)는 오류 주입 대상에서 제외 — 토큰 없이 벤치가 시작조차 못 함
+        if not path.endswith("/rest/v1/users") and random.random()<s.a.error_rate:
+            code,out=500,{"error":"fake"}
+        elif path.endswith("/graphql"):
+            s.hits["graphql"]+=1
+            inp=json.loads(body)[0]["variables"]["input"]
+            items=[] if random.random()<s.a.empty_rate else s.places(inp["query"],inp["start"],inp["display"])
+            out=[{"data":{"businesses":{"total":s.a.total,"items":items}}}]
+        elif "/rest/v1/" in path:
+            s.hits["supabase"]+=1
+            t=path.rsplit("/",1)[1];rows=s.db.setdefault(t,[]);m=scope["method"]
+            if m=="GET":
+                # id=gt.N + order=id.asc(집계 재계산용)만 흉내, 나머지는 최신순
+                lim=int(q.get("limit",1000));sel=rows
+                if q.get("id","").startswith("gt."):sel=[r for r in rows if r["id"]>int(q["id"][3:])]
+                out=sel[:lim] if q.get("order","").startswith("id.asc") else sel[-lim:][::-1]
+                hdr["content-range"]=f"0-{len(out)-1}/{len(rows)}"
+            elif m=="POST":
+                d=json.loads(body);d=d if isinstance(d,list) else [d]
+                for r in d:r["id"]=s.seq;s.seq+=1;rows.append(r)
+                code,out=201,d
+            elif m=="DELETE":
+                code,out=204,None
+        else:
+            out={"origin":"127.0.0.1"}
+        raw=b"" if out is None else json.dumps(out,ensure_ascii=False).encode()
+        await send({"type":"http.response.start","status":code,"headers":[(b"content-type",b"application/json"),(b"content-length",str(len(raw)).encode())]+[(k.encode(),v.encode()) for k,v in hdr.items()]})
+        await send({"type":"http.response.body","body":raw})
+
+async def pipe(r,w):
+    try:
+        while True:
+            b=await r.read(65536)
+            if not b:break
+            w.write(b);await w.drain()
+    except (ConnectionError,asyncio.CancelledError):
+        pass
+    finally:
+        w.close()
+
+def clen(head):
+    for l in head.lower().split(b"\r\n"):
+        if l.startswith(b"content-length:"):return int(l.split(b":")[1])
+    return 0
+
+def proxy(port,up):
+    """Decodo 대신 쓰는 최소 HTTP 프록시 — CONNECT는 터널, 절대 URL 요청은 요청마다 origin-form으로 바꿔 전달. 모두 가짜 서버(up)로 보냄"""
+    async def handle(cr,cw):
+        ur=uw=None
+        try:
+            while True:
+                head=await cr.readuntil(b"\r\n\r\n")
+                line,_,rest=head.partition(b"\r\n");m,target,ver=line.split(b" ",2)
+                if ur is None:ur,uw=await asyncio.open_connection("127.0.0.1",up)
+                if m==b"CONNECT":
+                    cw.write(b"HTTP/1.1 200 Connection established\r\n\r\n");await cw.drain()
+                    await asyncio.gather(pipe(cr,uw),pipe(ur,cw));return
+                path=b"/"+target.split(b"/",3)[3] if target.startswith(b"http") else target
+                uw.write(m+b" "+path+b" "+ver+b"\r\n"+rest+await cr.readexactly(clen(head)));await uw.drain()
+                rh=await ur.readuntil(b"\r\n\r\n")
+                cw.write(rh+await ur.readexactly(clen(rh)));await cw.drain()
+        except (asyncio.IncompleteReadError,asyncio.LimitOverrunError,ConnectionError):
+            pass
+        finally:
+            cw.close()
+            if uw:uw.close()
+    def run():
+        loop=asyncio.new_event_loop()
+        loop.run_until_complete(asyncio.start_server(handle,"127.0.0.1",port))
+        loop.run_forever()
+    threading.Thread(target=run,daemon=True).start()
+
+def serve(app,port):
+    import uvicorn
+    srv=uvicorn.Server(uvicorn.Config(app,host="127.0.0.1",port=port,log_level="warning",lifespan="on"))
+    threading.Thread(target=srv.run,daemon=True).start()
+    for _ in range(200):
+        if srv.started:return srv
+        time.sleep(.05)
+    raise RuntimeError(f"서버 시작 실패: {port}")
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:return int(f.read().split()[1])*os.sysconf("SC_PAGE_SIZE")/2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024
+
+def pct(xs,p):
+    xs=sorted(xs);return xs[min(len(xs)-1,int(len(xs)*p))]*1000 if xs else 0
+
+SCENARIOS={
+    "rank_check":lambda kw:("POST","/api/rank/check",{"json":{"keyword":kw,"place_id":str(1000000+random.randint(0,250))}}),
+    "keyhunter":lambda kw:("POST","/api/keyhunter/analyze",{"json":{"place_url":str(1000000+random.randint(0,50)),"keyword_count":10}}),
+    "sellerdb":lambda kw:("GET","/api/sellerdb/search",{"params":{"keyword":kw}}),
+    "sales_list":lambda kw:("GET","/api/sales",{"params":{"limit":100}}),
+    "sales_add":lambda kw:("POST","/api/sales",{"json":{"manager":"m1","sale_price":1000,"quantity":2,"cost":300}}),
+    "sales_summary":lambda kw:("GET","/api/sales/summary",{}),
+    "campaigns":lambda kw:("GET","/api/campaigns",{}),
+}
+
+async def drive(base,name,a,headers):
+    import httpx
+    lat=[];err=0;n=0;kws=[f"벤치 키워드{i}" for i in range(a.keywords)]
+    end=time.monotonic()+a.duration
+    async with httpx.AsyncClient(base_url=base,headers=headers,timeout=60,limits=httpx.Limits(max_connections=a.concurrency)) as c:
+        async def user():
+            nonlocal err,n
+            while time.monotonic()<end:
+                m,p,kw=SCENARIOS[name](random.choice(kws))
+                t0=time.perf_counter()
+                try:
+                    r=await c.request(m,p,**kw)
+                    if r.status_code>=400:err+=1
+                except Exception:
+                    err+=1
+                lat.append(time.perf_counter()-t0);n+=1
+        t0=time.monotonic()
+        await asyncio.gather(*[user() for _ in range(a.concurrency)])
+        el=time.monotonic()-t0
+    return {"requests":n,"errors":err,"rps":round(n/el,1),"p50":round(pct(lat,.5),1),"p95":round(pct(lat,.95),1),"p99":round(pct(lat,.99),1),"mean":round(statistics.fmean(lat)*1000,1) if lat else 0,"rss_mb":round(rss_mb(),1)}
+
+def main():
+    ap=argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scenarios",default=",".join(SCENARIOS))
+    ap.add_argument("--concurrency",type=int,default=16)
+    ap.add_argument("--duration",type=float,default=10)
+    ap.add_argument("--latency",type=float,default=50,help="가짜 업스트림 평균 지연(ms)")
+    ap.add_argument("--error-rate",type=float,default=0)
+    ap.add_argument("--empty-rate",type=float,default=0)
+    ap.add_argument("--total",type=int,default=300,help="검색 결과 총 업체 수")
+    ap.add_argument("--rows",type=int,default=5000,help="가짜 sales 행 수")
+    ap.add_argument("--keywords",type=int,default=50,help="서로 다른 키워드 수(캐시 적중률 조절)")
+    ap.add_argument("--json",help="결과 저장 경로")
+    ap.add_argument("--baseline",help="비교할 이전 결과(JSON)")
+    ap.add_argument("--tolerance",type=float,default=.2,help="허용 회귀 비율")
+    a=ap.parse_args()
+    fake=Fake(a);fp=free_port();serve(fake,fp);pp=free_port();proxy(pp,fp)
+    up=f"http://127.0.0.1:{fp}"
+    os.environ.update({"SUPABASE_URL":up,"SUPABASE_KEY":"bench","JWT_SECRET":"bench","NAVER_GQL_URL":up+"/graphql","PROXY_HOST":"127.0.0.1","PROXY_PORT_START":str(pp),"PROXY_PORT_END":str(pp),
+                       "PROXY_USER":"u","PROXY_PASS":"p","PROXY_PROBE_URL":up+"/ip","RANK_TRACKER":"0","NAVER_HEDGE_DELAY_DEFAULT":str(max(a.latency*3,100)/1000)})
+    sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+    import main as app_main, httpx
+    ap_port=free_port();serve(app_main.app,ap_port);base=f"http://127.0.0.1:{ap_port}"
+    tk=httpx.post(base+"/api/auth/login",json={"user_id":"bench","password":"x"}).json()["token"]
+    # rss는 앱·가짜 업스트림·프록시·부하 생성기가 함께 도는 이 프로세스 전체 기준 — 앱 단독 메모리 아님
+    res={"config":{k:v for k,v in vars(a).items() if k not in("json","baseline")},"rss_scope":"process(app+fakes+proxy+driver)","results":{}}
+    print(f"{'scenario':<14}{'req':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'rss':>8}")
+    for name in [x.strip() for x in a.scenarios.split(",") if x.strip()]:
+        if name not in SCENARIOS:sys.exit(f"알 수 없는 시나리오: {name}")
+        r=asyncio.run(drive(base,name,a,{"Authorization":f"Bearer {tk}"}));res["results"][name]=r
+        print(f"{name:<14}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9}{r['p50']:>9}{r['p95']:>9}{r['p99']:>9}{r['rss_mb']:>8}")
+    print("rss: 앱+가짜 업스트림+프록시+부하 생성기를 합친 한 프로세스 메모리(MB)")
+    res["upstream"]=fake.hits
+    if a.json:
+        with open(a.json,"w") as f:json.dump(res,f,ensure_ascii=False,indent=1)
+    if a.baseline:
+        with open(a.baseline) as f:base_res=json.load(f)["results"]
+        bad=[]
+        for name,r in res["results"].items():
+            b=base_res.get(name)
+            if not b:continue
+            if r["p95"]>b["p95"]*(1+a.tolerance):bad.append(f"{name} p95 {b['p95']}→{r['p95']}ms")
+            if r["rps"]<b["rps"]*(1-a.tolerance):bad.append(f"{name} rps {b['rps']}→{r['rps']}")
+        print("회귀: "+"; ".join(bad) if bad else "회귀 없음")
+        if bad:sys.exit(1)
+
+if __name__=="__main__":
+    main()
@@ -1,9 +1,12 @@
 """AdPeople Intranet API v3 — REST only, no Supabase SDK"""
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import os, httpx, random, hashlib, re, uvicorn, urllib.parse
+from typing import Optional, List
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import os, asyncio, httpx, random, hashlib, hmac, re, json, time, base64, csv, io, sqlite3, logging, contextvars, uvicorn, urllib.parse
 from datetime import datetime, timedelta
 
 SB = os.getenv("SUPABASE_URL","")
@@ -14,28 +17,402 @@ PP = os.getenv("PROXY_PASS","")
 P0 = int(os.getenv("PROXY_PORT_START","10001"))
 P1 = int(os.getenv("PROXY_PORT_END","19999"))
 SC = os.getenv("JWT_SECRET","adpeople-secret-2026")
+# HTTP 풀 설정
+H2 = os.getenv("HTTP2","1")=="1"
+HT = float(os.getenv("HTTP_TIMEOUT","15"))
+NT = float(os.getenv("NAVER_TIMEOUT","20"))
+PMAX = int(os.getenv("HTTP_POOL_MAX","100"))
+PKA = int(os.getenv("HTTP_POOL_KEEPALIVE","20"))
+PKE = float(os.getenv("HTTP_KEEPALIVE_EXPIRY","30"))
+PXN = int(os.getenv("PROXY_CLIENTS","32"))
+PXC = int(os.getenv("PROXY_CLIENT_CONN","8"))
+PXN_COLD = int(os.getenv("PROXY_COLD_CLIENTS","8"))
+# 병렬 검색 설정
+FAN = int(os.getenv("FANOUT_CONCURRENCY","8"))
+FDL = float(os.getenv("FANOUT_DEADLINE","25"))
+FAN_MAX = int(os.getenv("FANOUT_MAX_CONCURRENCY","32"))
+KH_MAX = int(os.getenv("KEYHUNTER_MAX_KEYWORDS","300"))
+RB_MAX = int(os.getenv("RANK_BATCH_MAX","500"))
+# 네이버 검색 캐시 설정 — 엔드포인트별 신선도(초)
+NCN = int(os.getenv("NAVER_CACHE_SIZE","2000"))
+NCDB = os.getenv("NAVER_CACHE_DB","")
+NC_TTL = {k:float(os.getenv(f"NAVER_CACHE_TTL_{k.upper()}",v)) for k,v in {"default":"600","sellerdb":"1800","rank":"300","keyhunter":"900"}.items()}
+# 순위 자동 추적 설정
+RT_ON = os.getenv("RANK_TRACKER","1")=="1"
+RT_DB = os.getenv("RANK_TRACKER_DB","rank_jobs.db")
+RT_TABLE = os.getenv("RANK_TRACKER_TABLE","rank_subscriptions")
+RT_PER_DAY = int(os.getenv("RANK_TRACKER_PER_DAY","1"))
+RT_JITTER = float(os.getenv("RANK_TRACKER_JITTER","300"))
+RT_RPS = float(os.getenv("RANK_TRACKER_RPS","0.5"))  # 네이버 요청(시도) 기준, 작업 수 아님
+RT_CONC = int(os.getenv("RANK_TRACKER_CONCURRENCY","2"))
+RT_RETRY = int(os.getenv("RANK_TRACKER_RETRY","5"))
+RT_BACKOFF = float(os.getenv("RANK_TRACKER_BACKOFF","60"))
+RT_REFRESH = float(os.getenv("RANK_TRACKER_REFRESH","600"))
+RT_KEEP = float(os.getenv("RANK_TRACKER_KEEP_DAYS","7"))
+# 프록시 포트 헬스 설정
+PM_MIN = int(os.getenv("PROXY_HEALTHY_MIN","16"))
+PM_EXPLORE = float(os.getenv("PROXY_EXPLORE","0.1"))
+PM_FAILS = int(os.getenv("PROXY_FAILS","2"))
+PM_EMPTY = int(os.getenv("PROXY_EMPTY_FAILS","5"))
+PM_COOL = float(os.getenv("PROXY_COOLDOWN","60"))
+PM_COOL_MAX = float(os.getenv("PROXY_COOLDOWN_MAX","3600"))
+PM_WARM = float(os.getenv("PROXY_WARM_INTERVAL","30"))
+PM_PROBE = os.getenv("PROXY_PROBE_URL","https://httpbin.org/ip")
+# 네이버 헤지 요청 설정 — mode: proxy(다른 포트→직접) / direct(직접) / off(순차 폴백)
+NH_MODE = os.getenv("NAVER_HEDGE","proxy")
+NH_DELAY = os.getenv("NAVER_HEDGE_DELAY","p50")
+NH_DELAY0 = float(os.getenv("NAVER_HEDGE_DELAY_DEFAULT","1.5"))
+NH_DEADLINE = float(os.getenv("NAVER_DEADLINE","25"))
+# 목록 API 페이지 크기
+LIST_LIMIT = int(os.getenv("LIST_LIMIT","100"))
+LIST_MAX = int(os.getenv("LIST_MAX","1000"))
+# 매출 집계 전체 재계산 주기(초)
+SR_RECONCILE = float(os.getenv("SALES_RECONCILE","900"))
+# 순위 시계열 캐시 (키워드×버킷 단위, 완료된 버킷만 보관)
+RS_CACHE = int(os.getenv("RANK_SERIES_CACHE","500"))
+RS_DAYS = int(os.getenv("RANK_SERIES_MAX_DAYS","366"))
+# 세션 설정
+AUTH_ON = os.getenv("AUTH_REQUIRED","1")=="1"
+SS_TTL = float(os.getenv("SESSION_TTL","43200"))
+SS_CACHE = int(os.getenv("SESSION_PROFILE_CACHE","1000"))
+SS_FLUSH = float(os.getenv("SESSION_REVOKE_FLUSH","5"))
+# 토큰 서명 키 — 기본값(SC 폴백)으로 서명하면 누구나 토큰을 만들 수 있으므로 JWT_SECRET이 없으면 프로세스별 임시 키 사용
+SS_KEY = os.getenv("JWT_SECRET","")
+# 셀러DB 대량 추출
+EX_MAX = int(os.getenv("EXPORT_MAX_KEYWORDS","2000"))
+EX_DEADLINE = float(os.getenv("EXPORT_DEADLINE","600"))
+# 계측 — SLOW_REQUEST_MS>0이면 느린 요청을 구간별 내역과 함께 로그
+SLOW_MS = float(os.getenv("SLOW_REQUEST_MS","0"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN","")
 
-app = FastAPI(title="AdPeople",version="3.0")
+log = logging.getLogger("adpeople")
+
+@asynccontextmanager
+async def life(a):
+    await pool.open()
+    if RT_ON:tracker.start()
+    pm.start()
+    rollup.start()
+    sessions.start()
+    yield
+    await sessions.stop()
+    await rollup.stop()
+    await pm.stop()
+    await tracker.stop()
+    await pool.close()
+
+app = FastAPI(title="AdPeople",version="3.0",lifespan=life)
 app.add_middleware(CORSMiddleware,allow_origins=["*"],allow_credentials=True,allow_methods=["*"],allow_headers=["*"])
 
+# METRICS — 프로메테우스 텍스트 형식 카운터/히스토그램 + 요청별 구간(span) 기록
+BUCKETS=(.005,.01,.025,.05,.1,.25,.5,1,2.5,5,10,20,30)
+SPANS=contextvars.ContextVar("spans",default=None)
+# 백그라운드 작업(순위 추적기)이 설정 — 네이버 시도 1건마다 기다릴 속도 제한 함수
+PACE=contextvars.ContextVar("pace",default=None)
+
+class Metrics:
+    def __init__(s):
+        s.c={};s.h={}
+    def inc(s,name,labels,v=1):
+        d=s.c.setdefault(name,{});k=tuple(sorted(labels.items()));d[k]=d.get(k,0)+v
+    def observe(s,name,labels,v):
+        d=s.h.setdefault(name,{});k=tuple(sorted(labels.items()))
+        h=d.get(k)
+        if h is None:h=d[k]=[0]*(len(BUCKETS)+2)
+        for i,b in enumerate(BUCKETS):
+            if v<=b:h[i]+=1;break
+        h[-2]+=v;h[-1]+=1
+    @staticmethod
+    def lbl(k,extra=()):
+        kv=[*k,*extra]
+        return "{"+",".join(f'{a}="{str(b).replace(chr(92),chr(92)*2).replace(chr(34),chr(92)+chr(34)).replace(chr(10),chr(92)+"n")}"' for a,b in kv)+"}" if kv else ""
+    def render(s,gauges=()):
+        out=[]
+        for name,d in s.c.items():
+            out.append(f"# TYPE {name} counter")
+            out+=[f"{name}{s.lbl(k)} {v}" for k,v in d.items()]
+        for name,d in s.h.items():
+            out.append(f"# TYPE {name} histogram")
+            for k,h in d.items():
+                acc=0
+                for i,b in enumerate(BUCKETS):
+                    acc+=h[i];out.append(f"{name}_bucket{s.lbl(k,[('le',b)])} {acc}")
+                out+=[f"{name}_bucket{s.lbl(k,[('le','+Inf')])} {h[-1]}",f"{name}_sum{s.lbl(k)} {round(h[-2],6)}",f"{name}_count{s.lbl(k)} {h[-1]}"]
+        for group,st in gauges:
+            for k,v in st.items():
+                name=f"adpeople_{group}_{k}"
+                if isinstance(v,(bool,int,float)):
+                    out+=[f"# TYPE {name} gauge",f"{name} {'+Inf' if v==float('inf') else float(v)}"]
+                elif isinstance(v,dict) and v and all(isinstance(x,(int,float)) for x in v.values()):
+                    out.append(f"# TYPE {name} gauge")
+                    out+=[f"{name}{s.lbl([('key',a)])} {float(b)}" for a,b in v.items()]
+        return "\n".join(out)+"\n"
+
+M=Metrics()
+
+def span(kind,dt,**labels):
+    """upstream 호출 1건 기록 — 히스토그램 + 현재 요청의 구간 목록"""
+    M.observe(f"adpeople_{kind}_seconds",labels,dt)
+    l=SPANS.get()
+    if l is not None:l.append((kind+":"+" ".join(str(v) for v in labels.values()),dt))
+
+def oops(where,e):
+    M.inc("adpeople_errors_total",{"where":where})
+    log.warning("%s: %r",where,e)
+
+class Timing:
+    """요청 시간 계측(ASGI) — 마지막 본문 조각(more_body=False)을 보낼 때까지 재므로 스트리밍 응답도 전체 시간이 잡힘"""
+    def __init__(s,app):
+        s.app=app
+    async def __call__(s,scope,receive,send):
+        if scope["type"]!="http":return await s.app(scope,receive,send)
+        l=[];tok=SPANS.set(l);t0=time.perf_counter();st={"status":500,"done":False}
+        async def snd(m):
+            if m["type"]=="http.response.start":st["status"]=m["status"]
+            await send(m)
+            if m["type"]=="http.response.body" and not m.get("more_body") and not st["done"]:
+                st["done"]=True;s.record(scope,st["status"],time.perf_counter()-t0,l)
+        try:
+            await s.app(scope,receive,snd)
+        finally:
+            SPANS.reset(tok)
+            if not st["done"]:st["done"]=True;s.record(scope,st["status"],time.perf_counter()-t0,l)
+    @staticmethod
+    def record(scope,status,dt,l):
+        rt=scope.get("route");route=getattr(rt,"path","unmatched");method=scope["method"]
+        M.observe("adpeople_http_request_seconds",{"route":route,"method":method},dt)
+        M.inc("adpeople_http_requests_total",{"route":route,"method":method,"status":status})
+        if SLOW_MS and dt*1000>=SLOW_MS:
+            br={}
+            for k,v in l:
+                b=br.setdefault(k,[0,0.0]);b[0]+=1;b[1]+=v
+            log.warning("slow %s %s %d %.0fms %s",method,scope["path"],status,dt*1000,
+                        " | ".join(f"{k} x{n} {t*1000:.0f}ms" for k,(n,t) in sorted(br.items(),key=lambda x:-x[1][1])) or "-")
+
+app.add_middleware(Timing)
+
 H={"apikey":SK,"Authorization":f"Bearer {SK}","Content-Type":"application/json","Prefer":"return=representation"}
 
+def purl(port):
+    return f"http://{PU}:{PP}@{PH}:{port}"
+
+class Pool:
+    """공유 httpx 클라이언트 — Supabase/네이버 직접 연결은 1개씩, 프록시는 포트별 warm 클라이언트(LRU, 최대 PXN개).
+    성공 기록이 없는 탐색 포트는 별도 cold LRU(PXN_COLD개)에 두어 warm 클라이언트를 밀어내지 않음"""
+    def __init__(s):
+        s._sb=None;s._nv=None;s.px=OrderedDict();s.cold=OrderedDict();s.hit=0;s.miss=0;s.evict=0
+    def _mk(s,proxy=None,conn=PMAX):
+        return httpx.AsyncClient(http2=H2,proxy=proxy,timeout=HT,limits=httpx.Limits(max_connections=conn,max_keepalive_connections=min(conn,PKA),keepalive_expiry=PKE))
+    @property
+    def sb(s):
+        if s._sb is None:s._sb=s._mk()
+        return s._sb
+    @property
+    def nv(s):
+        if s._nv is None:s._nv=s._mk()
+        return s._nv
+    def proxy(s,port):
+        c=s.px.get(port)
+        if c is not None:
+            s.hit+=1;s.px.move_to_end(port);return c
+        p=pm.ports.get(port)
+        if p is None or not p.ok:
+            # 아직 검증 안 된 포트 — cold LRU에서만 회전
+            return s._lru(s.cold,port,PXN_COLD)
+        c=s.cold.pop(port,None)
+        if c is not None:
+            s.hit+=1;s.px[port]=c;s._trim(s.px,PXN);return c
+        return s._lru(s.px,port,PXN)
+    def _lru(s,d,port,n):
+        c=d.get(port)
+        if c is not None:
+            s.hit+=1;d.move_to_end(port);return c
+        s.miss+=1;c=d[port]=s._mk(purl(port),PXC);s._trim(d,n)
+        return c
+    def _trim(s,d,n):
+        while len(d)>n:
+            _,old=d.popitem(last=False);s.evict+=1;s._retire(old)
+    async def probe(s,port):
+        """상태 확인용 1회성 클라이언트 — LRU에 넣지 않음"""
+        async with s._mk(purl(port),1) as c:
+            return await c.get(PM_PROBE,timeout=10)
+    def _retire(s,c):
+        # 진행 중인 요청이 끝날 시간을 준 뒤 닫음
+        try:asyncio.get_running_loop().call_later(NT+5,lambda:asyncio.ensure_future(c.aclose()))
+        except RuntimeError:pass
+    async def open(s):
+        s.sb;s.nv
+    async def close(s):
+        for c in [s._sb,s._nv,*s.px.values(),*s.cold.values()]:
+            if c is not None:await c.aclose()
+        s._sb=s._nv=None;s.px.clear();s.cold.clear()
+    def stats(s):
+        return {"http2":H2,"max_connections":PMAX,"keepalive":PKA,"proxy_clients":len(s.px),"proxy_clients_max":PXN,"cold_clients":len(s.cold),"hit":s.hit,"miss":s.miss,"evict":s.evict}
+
+pool=Pool()
+
+async def sbq(verb,t,url,**kw):
+    """Supabase REST 호출 1건 — 테이블/메서드/상태별 지연 기록"""
+    t0=time.perf_counter();st="error"
+    try:
+        r=await getattr(pool.sb,verb.lower())(url,**kw);st=r.status_code
+        return r
+    finally:
+        span("supabase",time.perf_counter()-t0,table=t,verb=verb,status=st)
 async def sg(t,q=""):
-    async with httpx.AsyncClient(timeout=15) as c:
-        r=await c.get(f"{SB}/rest/v1/{t}?{q}",headers=H);return r.json() if r.status_code==200 else []
+    r=await sbq("GET",t,f"{SB}/rest/v1/{t}?{q}",headers=H);return r.json() if r.status_code==200 else []
 async def sp(t,d):
-    async with httpx.AsyncClient(timeout=15) as c:
-        r=await c.post(f"{SB}/rest/v1/{t}",headers=H,json=d);return r.json() if r.status_code in(200,201) else None
+    r=await sbq("POST",t,f"{SB}/rest/v1/{t}",headers=H,json=d);return r.json() if r.status_code in(200,201) else None
 async def su(t,m,d):
-    async with httpx.AsyncClient(timeout=15) as c:
-        r=await c.patch(f"{SB}/rest/v1/{t}?{m}",headers=H,json=d);return r.json() if r.status_code==200 else None
+    r=await sbq("PATCH",t,f"{SB}/rest/v1/{t}?{m}",headers=H,json=d);return r.json() if r.status_code==200 else None
 async def sd(t,m):
-    async with httpx.AsyncClient(timeout=15) as c:
-        r=await c.delete(f"{SB}/rest/v1/{t}?{m}",headers=H);return r.status_code in(200,204)
+    r=await sbq("DELETE",t,f"{SB}/rest/v1/{t}?{m}",headers=H);return r.status_code in(200,204)
+
+COL=re.compile(r"^[a-z_][a-z0-9_]*$")
+def pq(v):
+    # PostgREST or=() 안의 값은 큰따옴표로 감싸 , . ( ) 이스케이프
+    return '"'+str(v).replace("\\","\\\\").replace('"','\\"')+'"'
+def cur_enc(v,i):
+    return base64.urlsafe_b64encode(json.dumps([v,i],ensure_ascii=False).encode()).decode().rstrip("=")
+def cur_dec(c):
+    try:
+        v,i=json.loads(base64.urlsafe_b64decode(c+"="*(-len(c)%4)));return v,int(i)
+    except Exception:
+        raise HTTPException(400,"잘못된 cursor 입니다")
+
+def when(name,v,end=False):
+    """date_from/date_to → (연산자, ISO 값). 날짜만 주면 date_to는 그날 끝까지 포함, 잘못된 값은 400"""
+    if not v:return None,None
+    try:d=datetime.fromisoformat(v.replace("Z","+00:00"))
+    except ValueError:raise HTTPException(400,f"잘못된 {name}: {v}")
+    if end and len(v)==10:return "lt",(d+timedelta(days=1)).isoformat()
+    return "lte" if end else "gte",d.isoformat()
+def period(col,date_from,date_to):
+    return [(col,*when("date_from",date_from)),(col,*when("date_to",date_to,True))]
+
+async def sg_list(request:Request,t,key,filters,select=None,limit=None,cursor=None):
+    """키셋 페이지네이션 목록 조회 — (key desc, id desc) 순, cursor는 마지막 행의 (key,id).
+    limit/cursor 둘 다 없으면 기존처럼 전체 반환(next_cursor 없음).
+    filters: [(컬럼, 연산자, 값)] 값이 비면 생략. 반환: 응답 dict 또는 변경 없을 때 304 Response"""
+    lim=None if limit is None and not cursor else bound(limit,LIST_LIMIT,LIST_MAX)
+    q=[("order",f"{key}.desc.nullsfirst,id.desc")]
+    if lim:q.append(("limit",str(lim)))
+    if select:
+        cols=[c.strip() for c in select.split(",") if c.strip()]
+        bad=[c for c in cols if not COL.match(c)]
+        if bad:raise HTTPException(400,f"잘못된 select 컬럼: {','.join(bad)}")
+        q.append(("select",",".join(dict.fromkeys(cols+[key,"id"]))))
+    for col,op,v in filters:
+        if v is not None and v!="":q.append((col,f"{op}.{v}"))
+    if cursor:
+        v,i=cur_dec(cursor)
+        q.append(("or",f"(and({key}.is.null,id.lt.{i}),{key}.not.is.null)" if v is None else f"({key}.lt.{pq(v)},and({key}.eq.{pq(v)},id.lt.{i}))"))
+    r=await sbq("GET",t,f"{SB}/rest/v1/{t}?{urllib.parse.urlencode(q)}",headers={**H,"Prefer":"count=estimated"})
+    rows=r.json() if r.status_code in(200,206) else []
+    tot=r.headers.get("content-range","").rpartition("/")[2]
+    etag='W/"'+hashlib.md5(r.content+tot.encode()).hexdigest()+'"'
+    if request.headers.get("if-none-match")==etag:
+        return Response(status_code=304,headers={"ETag":etag})
+    nxt=cur_enc(rows[-1].get(key),rows[-1]["id"]) if lim and len(rows)==lim else None
+    return {"rows":rows,"total":int(tot) if tot.isdigit() else None,"next_cursor":nxt,"limit":lim,"etag":etag}
+
+def listed(res,name,response:Response):
+    if isinstance(res,Response):return res
+    response.headers["ETag"]=res.pop("etag")
+    return {name:res.pop("rows"),**res}
+
+class PortStat:
+    __slots__=("ok","fail","http","empty","lat","streak","estreak","cool","until","seen")
+    def __init__(s):
+        s.ok=s.fail=s.http=s.empty=s.streak=s.estreak=0;s.lat=None;s.cool=0.0;s.until=0.0;s.seen=0.0
+    def weight(s):
+        # 빠르고 성공률 높은 포트일수록 가중치 ↑ — 빈 결과는 실제로 결과 없는 검색일 수 있어 절반만 반영
+        return (s.ok+1)/(s.ok+s.fail+s.http+s.empty/2+2)/((s.lat or NT/2)+.1)
+    def dict(s,port):
+        return {"port":port,"ok":s.ok,"fail":s.fail,"http":s.http,"empty":s.empty,"latency":round(s.lat,3) if s.lat is not None else None,"streak":s.streak,"empty_streak":s.estreak,"cooldown":s.cool,"until":round(s.until-time.time(),1) if s.until>time.time() else 0,"weight":round(s.weight(),4)}
+
+class ProxyManager:
+    """포트별 지연/실패/비200/빈결과 기록 → 건강한 포트 가중 랜덤 선택, 연속 실패 포트는 지수 쿨다운 격리, 백그라운드로 후보 워밍"""
+    def __init__(s):
+        s.ports={};s.task=None;s.picks=0;s.explored=0;s.probes=0
+    def st(s,port):
+        p=s.ports.get(port)
+        if p is None:p=s.ports[port]=PortStat()
+        return p
+    def healthy(s):
+        now=time.time()
+        # 연속 실패가 PM_FAILS 미만이면 유지 — 실패는 weight()에서 이미 감점
+        return [(k,p) for k,p in s.ports.items() if p.ok and p.streak<PM_FAILS and p.until<=now]
+    def expired(s):
+        """쿨다운이 끝난 격리 포트 — 오래 격리됐던 것부터, 프로브 성공 전까지는 선택 대상 아님(half-open)"""
+        now=time.time()
+        return [k for k,p in sorted(s.ports.items(),key=lambda x:x[1].until) if p.cool and p.until<=now and not (p.ok and p.streak<PM_FAILS)]
+    def candidate(s):
+        now=time.time()
+        for _ in range(20):
+            port=random.randint(P0,P1);p=s.ports.get(port)
+            if p is None or p.until<=now:return port
+        return random.randint(P0,P1)
+    def pick(s):
+        s.picks+=1
+        h=s.healthy()
+        if len(h)<PM_MIN and random.random()<max(PM_EXPLORE,1-len(h)/max(PM_MIN,1)) or not h:
+            s.explored+=1;return s.candidate()
+        return random.choices([k for k,_ in h],[p.weight() for _,p in h])[0]
+    def report(s,port,res,lat):
+        """res: ok / empty(빈 결과·캡차 의심) / http(비200) / error(예외·타임아웃)"""
+        p=s.st(port);p.seen=time.time()
+        if res=="ok":
+            p.ok+=1;p.streak=p.estreak=0;p.cool=0.0
+            p.lat=lat if p.lat is None else p.lat*.7+lat*.3
+            return
+        if res=="empty":
+            # 빈 결과(캡차 의심)는 별도 연속 카운트 — 정상적으로 결과 없는 검색이 건강한 포트를 격리하지 않도록 임계값을 따로 둠
+            p.empty+=1;p.estreak+=1
+            if p.estreak<PM_EMPTY:return
+            p.estreak=0
+        else:
+            k="http" if res=="http" else "fail"
+            setattr(p,k,getattr(p,k)+1);p.streak+=1
+            if p.streak<PM_FAILS:return
+        p.cool=min(p.cool*2 if p.cool else PM_COOL,PM_COOL_MAX);p.until=time.time()+p.cool
+    async def probe(s,port):
+        s.probes+=1;t0=time.monotonic()
+        try:
+            r=await pool.probe(port)
+            s.report(port,"ok" if r.status_code==200 else "http",time.monotonic()-t0)
+        except Exception:
+            s.report(port,"error",time.monotonic()-t0)
+    async def warm(s):
+        while True:
+            try:
+                # 쿨다운 끝난 격리 포트를 먼저 재확인(실패하면 쿨다운 2배), 모자라면 무작위 후보
+                ports=s.expired()[:8];n=PM_MIN-len(s.healthy())-len(ports)
+                ports+=[s.candidate() for _ in range(max(0,min(n,8-len(ports))))]
+                if ports and PU:await asyncio.gather(*[s.probe(p) for p in ports])
+            except Exception as e:
+                oops("proxy_warm",e)
+            await asyncio.sleep(PM_WARM)
+    def start(s):
+        s.task=asyncio.create_task(s.warm())
+    async def stop(s):
+        if s.task:
+            s.task.cancel()
+            try:await s.task
+            except asyncio.CancelledError:pass
+            s.task=None
+    def stats(s,top=20):
+        now=time.time();h=s.healthy();q=[(k,p) for k,p in s.ports.items() if p.until>now]
+        return {"total":P1-P0+1,"tracked":len(s.ports),"healthy":len(h),"quarantined":len(q),"picks":s.picks,"explored":s.explored,"probes":s.probes,
+                "top":[p.dict(k) for k,p in sorted(h,key=lambda x:-x[1].weight())[:top]],"quarantine":[p.dict(k) for k,p in sorted(q,key=lambda x:-x[1].until)[:top]]}
+
+pm=ProxyManager()
 
 def px():
-    return f"http://{PU}:{PP}@{PH}:{random.randint(P0,P1)}"
+    return pm.pick()
 
+GQL_URL = os.getenv("NAVER_GQL_URL","https://pcmap-api.place.naver.com/graphql")
+NV_PAGE = 100
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 NAVER_HEADERS = {
     "User-Agent": UA,
@@ -44,16 +421,15 @@ NAVER_HEADERS = {
     "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
 }
 
-async def naver_search(keyword: str, proxy: str):
+async def naver_fetch(keyword: str, port: int, start: int = 1):
     """네이버 플레이스 GraphQL API로 검색 — 캡차 우회"""
-    gql_url = "https://pcmap-api.place.naver.com/graphql"
     payload = [{
         "operationName": "getPlacesList",
         "variables": {
             "input": {
                 "query": keyword,
-                "start": 1,
-                "display": 100,
+                "start": start,
+                "display": NV_PAGE,
                 "adult": False,
                 "spq": False,
                 "queryRank": "",
@@ -74,33 +450,245 @@ async def naver_search(keyword: str, proxy: str):
         "Origin": "https://pcmap.place.naver.com",
         "Accept": "*/*",
     }
-    # 1차: 프록시 경유
+    return await hedged(lambda port: nv_try(port, payload, headers), port)
+
+def parse_places(r):
+    """GraphQL 응답 파싱 — (결과, 사유) 사유: ok / http(비200) / empty(빈 결과)"""
+    if r.status_code != 200:
+        return None, "http"
+    data = r.json()
+    if isinstance(data, list) and data:
+        biz = data[0].get("data", {}).get("businesses", {})
+        if biz and biz.get("items"):
+            items = biz["items"]
+            return {"list": [{"id": it.get("id",""), "name": it.get("name",""), "tel": it.get("tel","") or it.get("virtualTel",""), "address": it.get("address",""), "category": [it.get("category","")] if it.get("category") else [], "reviewCount": it.get("reviewCount",0), "blogReviewCount": it.get("blogCatalogReviewCount",0)} for it in items], "totalCount": biz.get("total",0)}, "ok"
+    return None, "empty"
+
+async def nv_try(port, payload, headers):
+    """1회 시도 — port가 None이면 프록시 없이 직접. 프록시 결과는 포트 헬스에 기록"""
+    pace = PACE.get()
+    if pace: await pace()
+    t0 = time.monotonic(); res = "error"
     try:
-        async with httpx.AsyncClient(proxy=proxy, timeout=20) as c:
-            r = await c.post(gql_url, json=payload, headers=headers)
-            if r.status_code == 200:
-                data = r.json()
-                if isinstance(data, list) and data:
-                    biz = data[0].get("data", {}).get("businesses", {})
-                    if biz and biz.get("items"):
-                        items = biz["items"]
-                        return {"list": [{"id": it.get("id",""), "name": it.get("name",""), "tel": it.get("tel","") or it.get("virtualTel",""), "address": it.get("address",""), "category": [it.get("category","")] if it.get("category") else [], "reviewCount": it.get("reviewCount",0), "blogReviewCount": it.get("blogCatalogReviewCount",0)} for it in items], "totalCount": biz.get("total",0)}
-    except:
-        pass
-    # 2차: 프록시 없이
+        r = await (pool.proxy(port) if port else pool.nv).post(GQL_URL, json=payload, headers=headers, timeout=NT)
+        out, res = parse_places(r)
+        return out
+    except asyncio.CancelledError:
+        res = None; raise
+    except Exception as e:
+        log.debug("naver %s: %r", port or "direct", e)
+        return None
+    finally:
+        if res:
+            span("naver", time.monotonic()-t0, path="proxy" if port else "direct", result=res)
+            if port: pm.report(port, res, time.monotonic()-t0)
+
+class Hedge:
+    """프록시·직접 시도 경쟁 — 지연(p50 또는 고정) 후 다음 경로 출발, 첫 유효 결과 채택 후 나머지 취소"""
+    def __init__(s):
+        s.lat=[];s.wins={};s.launched=0;s.cancelled=0;s.failed=0;s.timeouts=0
+    def delay(s):
+        if NH_MODE=="off":return float("inf")
+        if NH_DELAY!="p50":return float(NH_DELAY)
+        if len(s.lat)<20:return NH_DELAY0
+        return max(.2,sorted(s.lat)[len(s.lat)//2])
+    def won(s,path,lat):
+        s.wins[path]=s.wins.get(path,0)+1
+        s.lat.append(lat)
+        if len(s.lat)>200:del s.lat[:-200]
+    def stats(s):
+        return {"mode":NH_MODE,"delay":s.delay(),"deadline":NH_DEADLINE,"wins":s.wins,"launched":s.launched,"cancelled":s.cancelled,"failed":s.failed,"timeouts":s.timeouts}
+
+hedge=Hedge()
+
+async def hedged(attempt, port):
+    """attempt(port)를 경로 순서대로 경쟁 실행 — off: 프록시 실패 시에만 직접(기존 순차 폴백)"""
+    plan=[("proxy",port)]+([("hedge",px())] if NH_MODE=="proxy" else [])+[("direct",None)]
+    # 속도 제한 중(추적기)에는 지연 헤지 없이 실패 시에만 다음 경로 — 헤지는 요청을 더 써서 지연을 줄이는 것
+    run={};t0=time.monotonic();end=t0+NH_DEADLINE;wait=hedge.delay() if PACE.get() is None else NH_DEADLINE
+    def launch():
+        path,p=plan.pop(0);run[asyncio.create_task(attempt(p))]=path
+        if len(run)>1 or path!="proxy":hedge.launched+=1
+    launch()
     try:
-        async with httpx.AsyncClient(timeout=20) as c:
-            r = await c.post(gql_url, json=payload, headers=headers)
-            if r.status_code == 200:
-                data = r.json()
-                if isinstance(data, list) and data:
-                    biz = data[0].get("data", {}).get("businesses", {})
-                    if biz and biz.get("items"):
-                        items = biz["items"]
-                        return {"list": [{"id": it.get("id",""), "name": it.get("name",""), "tel": it.get("tel","") or it.get("virtualTel",""), "address": it.get("address",""), "category": [it.get("category","")] if it.get("category") else [], "reviewCount": it.get("reviewCount",0), "blogReviewCount": it.get("blogCatalogReviewCount",0)} for it in items], "totalCount": biz.get("total",0)}
-    except:
-        pass
-    return None
+        while run:
+            left=end-time.monotonic()
+            if left<=0:
+                hedge.timeouts+=1;break
+            done,_=await asyncio.wait(run,timeout=min(wait,left) if plan else left,return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if plan:launch()
+                continue
+            for t in done:
+                path=run.pop(t)
+                if not t.cancelled() and t.exception() is None and t.result():
+                    hedge.won(path,time.monotonic()-t0);return t.result()
+            # 실패한 경로는 바로 다음 경로로 교체
+            if plan:launch()
+        else:
+            hedge.failed+=1
+        return None
+    finally:
+        for t in run:
+            t.cancel();hedge.cancelled+=1
+
+class SqliteStore:
+    """여러 uvicorn 워커가 공유하는 캐시 백엔드 — 로컬 SQLite 파일"""
+    def __init__(s,path,keep=None,every=60):
+        s.path=path;s.keep=keep or max(NC_TTL.values());s.every=every;s.pruned=0.0
+        with s._db() as db:
+            db.execute("create table if not exists naver_cache(k text primary key,ts real,v text)")
+            db.execute("create index if not exists naver_cache_ts on naver_cache(ts)")
+    def _db(s):
+        return sqlite3.connect(s.path,timeout=5)
+    def _get(s,k,age):
+        with s._db() as db:
+            row=db.execute("select ts,v from naver_cache where k=? and ts>=?",(k,time.time()-age)).fetchone()
+        return (row[0],json.loads(row[1])) if row else None
+    def _set(s,k,v):
+        now=time.time()
+        with s._db() as db:
+            db.execute("insert or replace into naver_cache values(?,?,?)",(k,now,v))
+            # 가장 긴 TTL보다 오래된 행은 어느 엔드포인트도 못 쓰므로 주기적으로 삭제
+            if now-s.pruned>=s.every:
+                s.pruned=now;db.execute("delete from naver_cache where ts<?",(now-s.keep,))
+    async def get(s,k,age):
+        return await asyncio.to_thread(s._get,k,age)
+    async def set(s,k,v):
+        # 직렬화는 이벤트 루프에서 — 공유 중인 결과 dict가 다른 스레드에서 바뀌지 않게
+        await asyncio.to_thread(s._set,k,json.dumps(v,ensure_ascii=False))
+
+class SearchCache:
+    """naver_fetch 앞단 TTL+LRU 캐시 — 같은 키워드 동시 요청은 in-flight 호출 하나를 공유, 기다리는 호출자가 모두 취소되면 조회도 취소"""
+    def __init__(s,size=NCN,store=None):
+        s.size=size;s.store=store;s.d=OrderedDict();s.fly={};s.waiting={}
+        s.hit=0;s.miss=0;s.coalesced=0;s.evict=0;s.store_hit=0
+    @staticmethod
+    def key(kw):
+        return " ".join(kw.split()).lower()
+    def peek(s,k,age):
+        e=s.d.get(k)
+        if e and time.time()-e[0]<=age:
+            s.d.move_to_end(k);return e[1]
+        return None
+    def put(s,k,v,ts=None):
+        s.d[k]=(ts or time.time(),v);s.d.move_to_end(k)
+        while len(s.d)>s.size:
+            s.d.popitem(last=False);s.evict+=1
+    async def get(s,k,age,fetch):
+        v=s.peek(k,age)
+        if v is not None:
+            s.hit+=1;return v
+        t=s.fly.get(k)
+        if t is not None:
+            s.coalesced+=1
+        else:
+            s.miss+=1
+            t=s.fly[k]=asyncio.create_task(s._load(k,age,fetch))
+            t.add_done_callback(lambda _:s.fly.pop(k,None))
+        # 호출자 하나가 취소돼도 공유 중인 조회는 계속 — 마지막 호출자까지 떠나면 그때 취소
+        s.waiting[t]=s.waiting.get(t,0)+1
+        try:
+            return await asyncio.shield(t)
+        finally:
+            n=s.waiting.pop(t)-1
+            if n:s.waiting[t]=n
+            elif not t.done():t.cancel()
+    async def _load(s,k,age,fetch):
+        if s.store:
+            try:
+                e=await s.store.get(k,age)
+                if e is not None:
+                    s.store_hit+=1;s.put(k,e[1],e[0]);return e[1]
+            except Exception as e:oops("cache_store_get",e)
+        v=await fetch()
+        if v is not None:
+            s.put(k,v)
+            if s.store:
+                try:await s.store.set(k,v)
+                except Exception as e:oops("cache_store_set",e)
+        return v
+    def stats(s):
+        return {"size":len(s.d),"max":s.size,"hit":s.hit,"miss":s.miss,"coalesced":s.coalesced,"evict":s.evict,"store_hit":s.store_hit,"inflight":len(s.fly),"store":bool(s.store),"ttl":NC_TTL}
+
+ncache=SearchCache(store=SqliteStore(NCDB) if NCDB else None)
+
+async def naver_search(keyword: str, port: int, ttl: Optional[float]=None, start: int = 1):
+    """캐시 경유 검색 — ttl은 호출 엔드포인트가 허용하는 결과 나이(초), 페이지(start)마다 따로 캐시"""
+    k=ncache.key(keyword)+(f"@{start}" if start>1 else "")
+    return await ncache.get(k,NC_TTL["default"] if ttl is None else ttl,lambda:naver_fetch(keyword,port,start))
+
+async def naver_deep(keyword: str, port: int, depth: int = NV_PAGE, match=None, ttl: Optional[float]=None, window: Optional[int]=None):
+    """depth위까지 검색 — 2페이지부터는 서로 다른 포트로 동시에(window개씩, None이면 전부) 조회.
+    1페이지부터 이어진 결과에서 match(place)가 참이면 나머지 페이지는 취소 — 다른 요청이 같은 페이지를 기다리지 않으면
+    실제 조회(아직 안 보낸 헤지·직접 시도 포함)도 멈춤, 이미 보낸 요청은 되돌릴 수 없음. 실패한 페이지는 빈 항목({})으로 채워 뒤 순위 유지하고
+    시작 위치를 "failed"에 기록 — 못 찾았는데 failed가 있으면 "없음"이 아니라 조회 실패로 다뤄야 함"""
+    first=await naver_search(keyword,port,ttl)
+    if not first or depth<=NV_PAGE or match and match(first):return first
+    starts=list(range(1+NV_PAGE,min(depth,first.get("totalCount",0))+1,NV_PAGE))
+    if not starts:return first
+    pages={1:first["list"]};failed=[]
+    def merged():
+        out=[]
+        for st in [1,*starts]:
+            if st not in pages:break
+            pg=pages[st]
+            out+=pg if st==starts[-1] else pg+[{}]*(NV_PAGE-len(pg))
+        return {"list":out,"totalCount":first.get("totalCount",0),"failed":sorted(failed)}
+    todo=list(starts);tasks={}
+    def launch():
+        while todo and (window is None or len(tasks)<window):
+            st=todo.pop(0);tasks[asyncio.create_task(naver_search(keyword,px(),ttl,st))]=st
+    launch()
+    try:
+        while tasks:
+            done,_=await asyncio.wait(tasks,return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                st=tasks.pop(t);r=None if t.cancelled() or t.exception() else t.result()
+                pages[st]=r["list"] if r else [{}]*NV_PAGE
+                if not r:failed.append(st)
+            if match and match(merged()):break
+            launch()
+    finally:
+        for t in tasks:t.cancel()
+    return merged()
+
+def bound(v,default,hi,lo=1):
+    """클라이언트가 준 값(None이면 기본값)을 lo..hi로 제한"""
+    return default if v is None else max(lo,min(v,hi))
+
+async def fanout(items, fn, conc=FAN, deadline=FDL):
+    """items를 conc개 워커로 병렬 실행 — 워커마다 px() 포트 하나씩 사용, 끝나는 순서대로 (item, 결과, 에러) yield.
+    deadline(초)이 지나면 남은 작업은 취소하고 종료 → 호출측은 받은 만큼만 부분 결과로 사용.
+    결과 큐는 conc개로 제한 — 소비가 느리면(느린 클라이언트) 워커가 기다려 메모리가 쌓이지 않음"""
+    conc=max(1,min(conc,len(items)))
+    q=asyncio.Queue();out=asyncio.Queue(conc)
+    for it in items:q.put_nowait(it)
+    async def worker():
+        port=px()
+        while True:
+            try:it=q.get_nowait()
+            except asyncio.QueueEmpty:return
+            try:
+                r=await fn(it,port);res=(it,r,None)
+            except Exception as e:
+                r=None;res=(it,None,e)
+            await out.put(res)
+            # 실패한 워커는 다른 포트로 교체
+            if r is None:port=px()
+    tasks=[asyncio.create_task(worker()) for _ in range(conc)]
+    end=time.monotonic()+deadline
+    try:
+        for _ in range(len(items)):
+            left=end-time.monotonic()
+            if left<=0:break
+            try:yield await asyncio.wait_for(out.get(),left)
+            except asyncio.TimeoutError:break
+    finally:
+        for t in tasks:t.cancel()
+
+def sse(ev,d):
+    return f"event: {ev}\ndata: {json.dumps(d,ensure_ascii=False)}\n\n"
 
 class LoginReq(BaseModel):
     user_id:str;password:str
@@ -114,8 +702,100 @@ class TeamReq(BaseModel):
     name:str;position:str="";role:str="STAFF";level:int=1
 class RankReq(BaseModel):
     keyword:str;place_id:Optional[str]=None;place_name:Optional[str]=None;phone:Optional[str]=None;rank_range:int=300
+class ExportReq(BaseModel):
+    keywords:List[str];format:str="csv";limit:int=50;concurrency:Optional[int]=None;deadline:Optional[float]=None
 class KHReq(BaseModel):
-    place_url:str;keyword_count:int=30;rank_limit:int=5
+    place_url:str;keyword_count:int=30;rank_limit:int=5;concurrency:Optional[int]=None;deadline:Optional[float]=None;stream:Optional[str]=None
+
+# SESSION — HMAC(JWT_SECRET) 서명 토큰, 검증은 I/O 없이 메모리에서
+def b64e(b):
+    return base64.urlsafe_b64encode(b).decode().rstrip("=")
+def b64d(t):
+    return base64.urlsafe_b64decode(t+"="*(-len(t)%4))
+
+class Sessions:
+    """토큰 발급/검증 + 프로필 LRU + 폐기 목록. 폐기는 SS_FLUSH마다 revoked_tokens 테이블에 한 번에 기록하고 다른 워커 것도 가져옴"""
+    def __init__(s):
+        s.key=SS_KEY.encode() or os.urandom(32);s.revoked={};s.pending=[];s.profiles=OrderedDict();s.task=None;s.bg=set()
+        s.ok=0;s.bad=0;s.flushed=0
+    def issue(s,u):
+        body=b64e(json.dumps({"uid":u["id"],"sub":u["user_id"],"role":u.get("role","STAFF"),"level":u.get("level",1),"exp":int(time.time()+SS_TTL),"jti":b64e(os.urandom(9))},separators=(",",":")).encode())
+        return body+"."+b64e(hmac.new(s.key,body.encode(),hashlib.sha256).digest())
+    def verify(s,tk):
+        try:
+            body,sig=tk.split(".")
+            if not hmac.compare_digest(b64d(sig),hmac.new(s.key,body.encode(),hashlib.sha256).digest()):return None
+            c=json.loads(b64d(body))
+        except Exception:
+            return None
+        if c["exp"]<time.time() or c["jti"] in s.revoked:return None
+        return c
+    async def check(s,tk):
+        # 서명 토큰만 허용 — 이전 방식(users.token sha256)은 만료·폐기가 안 돼 재로그인 필요
+        c=s.verify(tk)
+        if c:s.ok+=1
+        else:s.bad+=1
+        return c
+    def later(s,coro):
+        """응답을 기다리게 하지 않을 쓰기 — 태스크 참조를 보관하고 stop에서 마무리"""
+        t=asyncio.create_task(coro);s.bg.add(t);t.add_done_callback(s.bg.discard)
+    def revoke(s,c):
+        s.revoked[c["jti"]]=c["exp"];s.pending.append({"jti":c["jti"],"exp":c["exp"]})
+    def remember(s,u):
+        s.profiles[u["id"]]=u;s.profiles.move_to_end(u["id"])
+        while len(s.profiles)>SS_CACHE:s.profiles.popitem(last=False)
+    async def profile(s,uid):
+        u=s.profiles.get(uid)
+        if u is None:
+            rows=await sg("users",f"id=eq.{uid}&select=id,user_id,name,position,role,level")
+            if not rows:return None
+            u=rows[0];s.remember(u)
+        return u
+    def invalidate(s,uid=None):
+        if uid is None:s.profiles.clear()
+        else:s.profiles.pop(uid,None)
+    async def flush(s):
+        now=time.time()
+        if s.pending:
+            batch,s.pending=s.pending,[]
+            if await sp("revoked_tokens",batch) is None:s.pending=batch+s.pending
+            else:s.flushed+=len(batch)
+        for r in await sg("revoked_tokens",f"exp=gt.{int(now)}&select=jti,exp"):s.revoked[r["jti"]]=r["exp"]
+        s.revoked={k:v for k,v in s.revoked.items() if v>now}
+    async def loop(s):
+        while True:
+            try:await s.flush()
+            except asyncio.CancelledError:raise
+            except Exception as e:oops("session_flush",e)
+            await asyncio.sleep(SS_FLUSH)
+    def start(s):
+        if not SS_KEY and AUTH_ON:log.error("JWT_SECRET 미설정 — 프로세스별 임시 키로 토큰 서명 중: 재시작하면 모두 로그아웃되고 워커 간 토큰이 통하지 않음")
+        s.task=asyncio.create_task(s.loop())
+    async def stop(s):
+        if s.task:
+            s.task.cancel()
+            try:await s.task
+            except asyncio.CancelledError:pass
+            s.task=None
+        if s.bg:await asyncio.gather(*s.bg,return_exceptions=True)
+        if s.pending:await s.flush()
+    def stats(s):
+        return {"required":AUTH_ON,"ok":s.ok,"bad":s.bad,"revoked":len(s.revoked),"pending":len(s.pending),"flushed":s.flushed,"profiles":len(s.profiles)}
+
+sessions=Sessions()
+PUBLIC={"/","/health","/metrics","/api/auth/login","/docs","/redoc","/openapi.json"}
+
+async def auth(request:Request):
+    """모든 라우트 공통 의존성 — Authorization: Bearer 또는 X-Token 헤더(쿼리스트링은 액세스 로그에 남아 받지 않음), 결과는 request.state.user"""
+    if request.url.path in PUBLIC:return None
+    h=request.headers.get("authorization","")
+    tk=h[7:] if h[:7].lower()=="bearer " else request.headers.get("x-token")
+    c=await sessions.check(tk) if tk else None
+    if c is None and AUTH_ON:raise HTTPException(401,"로그인이 필요합니다")
+    request.state.user=c
+    return c
+
+app.router.dependencies.append(Depends(auth))
 
 @app.get("/")
 def root():
@@ -123,6 +803,22 @@ def root():
 @app.get("/health")
 def health():
     return {"status":"ok","sb":bool(SB),"px":PH}
+@app.get("/metrics")
+def metrics(request:Request):
+    if METRICS_TOKEN and request.headers.get("authorization")!=f"Bearer {METRICS_TOKEN}":raise HTTPException(401,"metrics token")
+    g=[("pool",pool.stats()),("naver_cache",ncache.stats()),("naver_hedge",hedge.stats()),("sessions",sessions.stats()),
+       ("tracker",{"ok":tracker.ok,"retried":tracker.retried,"failed":tracker.failed,"subscriptions":tracker.subs,"paused":tracker.paused})]
+    st=pm.stats(0);g.append(("proxy",{k:v for k,v in st.items() if not isinstance(v,list)}))
+    return Response(M.render(g),media_type="text/plain; version=0.0.4")
+@app.get("/api/pool/status")
+def pool_status():
+    return pool.stats()
+@app.get("/api/cache/status")
+def cache_status():
+    return ncache.stats()
+@app.get("/api/naver/status")
+def naver_status():
+    return hedge.stats()
 
 # AUTH
 @app.post("/api/auth/login")
@@ -130,14 +826,32 @@ async def login(r:LoginReq):
     h=hashlib.sha256((r.password+SC).encode()).hexdigest()
     rows=await sg("users",f"user_id=eq.{r.user_id}&password_hash=eq.{h}")
     if not rows: raise HTTPException(401,"아이디 또는 비밀번호가 올바르지 않습니다")
-    u=rows[0];tk=hashlib.sha256(f"{r.user_id}{datetime.now().isoformat()}{SC}".encode()).hexdigest()
-    await su("users",f"id=eq.{u['id']}",{"token":tk,"last_login":datetime.now().isoformat()})
-    return {"success":True,"token":tk,"user":{"id":u["id"],"user_id":u["user_id"],"name":u["name"],"position":u.get("position",""),"role":u.get("role","STAFF"),"level":u.get("level",1)}}
+    u=rows[0];tk=sessions.issue(u)
+    user={"id":u["id"],"user_id":u["user_id"],"name":u["name"],"position":u.get("position",""),"role":u.get("role","STAFF"),"level":u.get("level",1)}
+    sessions.remember(user)
+    # last_login 기록은 응답을 기다리게 하지 않음 — 남아 있는 이전 방식 토큰도 비움
+    sessions.later(su("users",f"id=eq.{u['id']}",{"token":None,"last_login":datetime.now().isoformat()}))
+    return {"success":True,"token":tk,"user":user}
+@app.post("/api/auth/logout")
+async def logout(request:Request):
+    c=request.state.user
+    if c:sessions.revoke(c)
+    return {"success":True}
+@app.get("/api/auth/me")
+async def me(request:Request):
+    c=request.state.user
+    if not c:raise HTTPException(401,"로그인이 필요합니다")
+    u=await sessions.profile(c["uid"])
+    if not u:raise HTTPException(401,"사용자를 찾을 수 없습니다")
+    return {"user":u,"exp":c["exp"]}
+@app.get("/api/auth/status")
+def auth_status():
+    return sessions.stats()
 
 # CAMPAIGNS
 @app.get("/api/campaigns")
-async def get_camp():
-    return {"campaigns":await sg("campaigns","order=created_at.desc")}
+async def get_camp(request:Request,response:Response,limit:Optional[int]=None,cursor:Optional[str]=None,select:Optional[str]=None,manager:Optional[str]=None,status:Optional[str]=None,product_type:Optional[str]=None,sales_type:Optional[str]=None,date_from:Optional[str]=None,date_to:Optional[str]=None):
+    return listed(await sg_list(request,"campaigns","created_at",[("manager","eq",manager),("status","eq",status),("product_type","eq",product_type),("sales_type","eq",sales_type),*period("created_at",date_from,date_to)],select,limit,cursor),"campaigns",response)
 @app.post("/api/campaigns")
 async def add_camp(d:CampReq):
     return {"success":True,"data":await sp("campaigns",{**d.dict(),"created_at":datetime.now().isoformat()})}
@@ -147,15 +861,103 @@ async def del_camp(i:int):
 
 # SALES
 @app.get("/api/sales")
-async def get_sales():
-    return {"records":await sg("sales","order=created_at.desc")}
+async def get_sales(request:Request,response:Response,limit:Optional[int]=None,cursor:Optional[str]=None,select:Optional[str]=None,manager:Optional[str]=None,product_type:Optional[str]=None,sales_type:Optional[str]=None,date_from:Optional[str]=None,date_to:Optional[str]=None):
+    return listed(await sg_list(request,"sales","created_at",[("manager","eq",manager),("product_type","eq",product_type),("sales_type","eq",sales_type),*period("created_at",date_from,date_to)],select,limit,cursor),"records",response)
 @app.post("/api/sales")
 async def add_sale(d:SaleReq):
     x=d.dict();x["billing"]=d.sale_price*d.quantity;x["billing_vat"]=x["billing"]*1.1;x["cost_vat"]=d.cost*1.1;x["margin"]=x["billing_vat"]-x["cost_vat"];x["created_at"]=datetime.now().isoformat()
-    return {"success":True,"data":await sp("sales",x)}
+    data=await sp("sales",x)
+    for r in data or []:rollup.add(r)
+    return {"success":True,"data":data}
 @app.delete("/api/sales/{i}")
 async def del_sale(i:int):
-    await sd("sales",f"id=eq.{i}");return {"success":True}
+    if await sd("sales",f"id=eq.{i}"):rollup.remove(i)
+    return {"success":True}
+
+class SalesRollup:
+    """매출 집계 메모리 캐시 — (manager, product_type, sales_type, month)별 합계.
+    add_sale/del_sale에서 증분 반영, SR_RECONCILE마다 Supabase 전체와 대조해 교체"""
+    DIMS=("manager","product_type","sales_type","month")
+    VALS=("billing","billing_vat","cost_vat","margin")
+    COLS="id,manager,product_type,sales_type,contract_date,created_at,billing,billing_vat,cost_vat,margin"
+    def __init__(s):
+        s.agg={};s.rows={};s.task=None;s.ready=asyncio.Event();s.journal=None;s.at=None;s.error=None
+    @staticmethod
+    def key(r):
+        m=(r.get("contract_date") or "")[:7] or (r.get("created_at") or "")[:7]
+        return (r.get("manager") or "",r.get("product_type") or "",r.get("sales_type") or "",m)
+    @staticmethod
+    def _apply(agg,rows,r,sign):
+        i=r.get("id")
+        if sign>0:
+            k=SalesRollup.key(r);v=tuple(float(r.get(c) or 0) for c in SalesRollup.VALS)
+            if i in rows:return
+            rows[i]=(k,v)
+        else:
+            if i not in rows:return
+            k,v=rows.pop(i)
+        a=agg.setdefault(k,[0,0.0,0.0,0.0,0.0])
+        a[0]+=sign
+        for j,x in enumerate(v):a[j+1]+=sign*x
+        if a[0]<=0:agg.pop(k,None)
+    def add(s,r):
+        if s.journal is not None:s.journal.append((1,r))
+        s._apply(s.agg,s.rows,r,1)
+    def remove(s,i):
+        if s.journal is not None:s.journal.append((-1,{"id":i}))
+        s._apply(s.agg,s.rows,{"id":i},-1)
+    async def reconcile(s):
+        s.journal=[]
+        try:
+            agg={};rows={};last=0
+            while True:
+                # sg는 오류 시 []라서 집계가 비지 않도록 상태코드 직접 확인
+                r=await sbq("GET","sales",f"{SB}/rest/v1/sales?select={s.COLS}&id=gt.{last}&order=id.asc&limit=1000",headers=H)
+                if r.status_code!=200:raise RuntimeError(f"sales {r.status_code}")
+                page=r.json()
+                for r in page:s._apply(agg,rows,r,1)
+                if len(page)<1000:break
+                last=page[-1]["id"]
+            # 재계산 도중 들어온 변경 반영
+            for sign,r in s.journal:s._apply(agg,rows,r,sign)
+            s.agg,s.rows=agg,rows;s.at=datetime.now().isoformat();s.error=None
+        finally:
+            s.journal=None;s.ready.set()
+    async def loop(s):
+        while True:
+            try:await s.reconcile()
+            except asyncio.CancelledError:raise
+            except Exception as e:s.error=str(e);oops("sales_reconcile",e)
+            await asyncio.sleep(SR_RECONCILE)
+    def start(s):
+        s.task=asyncio.create_task(s.loop())
+    async def stop(s):
+        if s.task:
+            s.task.cancel()
+            try:await s.task
+            except asyncio.CancelledError:pass
+            s.task=None
+    def summary(s,by,flt):
+        idx=[s.DIMS.index(d) for d in by];out={};tot=[0,0.0,0.0,0.0,0.0]
+        for k,a in s.agg.items():
+            if any(v is not None and k[j]!=v for j,v in flt.get("eq",())):continue
+            if flt.get("from") and k[3]<flt["from"] or flt.get("to") and k[3]>flt["to"]:continue
+            g=tuple(k[j] for j in idx);o=out.setdefault(g,[0,0.0,0.0,0.0,0.0])
+            for j in range(5):o[j]+=a[j];tot[j]+=a[j]
+        row=lambda a:{"count":a[0],**{c:round(a[j+1],2) for j,c in enumerate(s.VALS)}}
+        return {"group_by":list(by),"groups":[{**dict(zip(by,g)),**row(a)} for g,a in sorted(out.items())],"total":row(tot),"reconciled_at":s.at,"rows":len(s.rows),"error":s.error}
+
+rollup=SalesRollup()
+
+@app.get("/api/sales/summary")
+async def sales_summary(group_by:str="manager,month",manager:Optional[str]=None,product_type:Optional[str]=None,sales_type:Optional[str]=None,month_from:Optional[str]=None,month_to:Optional[str]=None):
+    by=[d.strip() for d in group_by.split(",") if d.strip()]
+    bad=[d for d in by if d not in SalesRollup.DIMS]
+    if bad:raise HTTPException(400,f"group_by는 {','.join(SalesRollup.DIMS)} 중에서 선택: {','.join(bad)}")
+    if not rollup.ready.is_set():
+        if rollup.task is None:await rollup.reconcile()
+        else:await rollup.ready.wait()
+    return rollup.summary(by,{"eq":[(0,manager),(1,product_type),(2,sales_type)],"from":month_from,"to":month_to})
 
 # NOTICES
 @app.get("/api/notices")
@@ -170,39 +972,80 @@ async def del_notice(i:int):
 
 # TEAM
 @app.get("/api/team")
-async def get_team():
-    return {"members":await sg("team_members","order=level.desc")}
+async def get_team(request:Request,response:Response,limit:Optional[int]=None,cursor:Optional[str]=None,select:Optional[str]=None,status:Optional[str]=None,role:Optional[str]=None,position:Optional[str]=None):
+    return listed(await sg_list(request,"team_members","level",[("status","eq",status),("role","eq",role),("position","eq",position)],select,limit,cursor),"members",response)
 @app.post("/api/team")
 async def add_team(d:TeamReq):
-    return {"success":True,"data":await sp("team_members",{**d.dict(),"status":"active","created_at":datetime.now().isoformat()})}
+    data=await sp("team_members",{**d.dict(),"status":"active","created_at":datetime.now().isoformat()})
+    sessions.invalidate()
+    return {"success":True,"data":data}
 @app.delete("/api/team/{i}")
 async def del_team(i:int):
-    await sd("team_members",f"id=eq.{i}");return {"success":True}
+    await sd("team_members",f"id=eq.{i}");sessions.invalidate();return {"success":True}
 
 # SELLER DB
+def seller_row(i,pl):
+    return {"rank":i+1,"name":pl.get("name",""),"tel":pl.get("tel",""),"address":pl.get("address",""),"category":pl.get("category",[]),"review_count":pl.get("reviewCount",0),"blog_review_count":pl.get("blogReviewCount",0),"rating":pl.get("rating",0)}
+
 @app.get("/api/sellerdb/search")
 async def sellers(keyword:str,limit:int=50):
     p=px()
-    place=await naver_search(keyword, p)
+    place=await naver_search(keyword, p, NC_TTL["sellerdb"])
     if not place:
         return {"keyword":keyword,"count":0,"sellers":[],"error":"네이버 검색 결과를 가져올 수 없습니다"}
     plist=place.get("list",[])
-    return {"keyword":keyword,"count":len(plist[:limit]),"sellers":[{"rank":i+1,"name":pl.get("name",""),"tel":pl.get("tel",""),"address":pl.get("address",""),"category":pl.get("category",[]),"review_count":pl.get("reviewCount",0),"blog_review_count":pl.get("blogReviewCount",0),"rating":pl.get("rating",0)} for i,pl in enumerate(plist[:limit])]}
+    return {"keyword":keyword,"count":len(plist[:limit]),"sellers":[seller_row(i,pl) for i,pl in enumerate(plist[:limit])]}
+
+EX_COLS=["keyword","rank","id","name","tel","address","category","review_count","blog_review_count","status","error"]
+
+@app.post("/api/sellerdb/export")
+async def sellers_export(req:ExportReq):
+    """키워드 목록 → 병렬 검색 → 업체 id/전화번호로 중복 제거 → CSV/NDJSON 스트리밍.
+    ndjson은 키워드마다 progress 줄과 끝에 done 요약 줄. csv는 업체 행 status=ok, 실패 키워드는 status=error,
+    마감 시간에 못 끝낸 키워드는 status=timeout 행을 하나씩 남겨 부분 결과임을 알 수 있게 함"""
+    kws=list(dict.fromkeys(k.strip() for k in req.keywords if k.strip()))
+    if not kws:raise HTTPException(400,"keywords가 비어 있습니다")
+    if len(kws)>EX_MAX:raise HTTPException(400,f"키워드는 최대 {EX_MAX}개")
+    if req.format not in("csv","ndjson"):raise HTTPException(400,"format은 csv 또는 ndjson")
+    nd=req.format=="ndjson"
+    def line(d):
+        if nd:return json.dumps(d,ensure_ascii=False)+"\n"
+        b=io.StringIO();csv.writer(b).writerow(d);return b.getvalue()
+    async def gen():
+        seen=set();done=0;rows=0;dup=0;failed=[]
+        t0=time.monotonic()
+        yield line({"type":"start","keywords":len(kws)}) if nd else "\ufeff"+line(EX_COLS)
+        left=dict.fromkeys(kws)
+        async for kw,place,err in fanout(kws,lambda kw,port:naver_search(kw,port,NC_TTL["sellerdb"]),bound(req.concurrency,FAN,FAN_MAX),bound(req.deadline,EX_DEADLINE,EX_DEADLINE,.1)):
+            done+=1;n=0;left.pop(kw,None)
+            if not place:
+                failed.append(kw)
+                if not nd:yield line([kw]+[""]*(len(EX_COLS)-3)+["error",str(err or "검색 실패")])
+            for i,pl in enumerate((place or {}).get("list",[])[:bound(req.limit,50,NV_PAGE)]):
+                ks={k for k in ("id:"+str(pl.get("id") or ""),"tel:"+(pl.get("tel") or "").replace("-","")) if k[-1]!=":"}
+                if ks&seen:
+                    dup+=1;continue
+                seen|=ks;n+=1
+                r={"keyword":kw,"id":pl.get("id",""),**seller_row(i,pl)}
+                yield line({"type":"seller",**r}) if nd else line([r[c] if c!="category" else "/".join(r[c]) for c in EX_COLS[:-2]]+["ok",""])
+            rows+=n
+            if nd:yield line({"type":"progress","keyword":kw,"status":"ok" if place else "error","rows":n,"done":done,"total":len(kws)})
+        if nd:yield line({"type":"done","keywords":len(kws),"done":done,"rows":rows,"duplicates":dup,"failed":failed,"unfinished":list(left),"elapsed":round(time.monotonic()-t0,3)})
+        else:
+            for kw in left:yield line([kw]+[""]*(len(EX_COLS)-3)+["timeout","마감 시간 초과"])
+    fn=f"sellerdb_{datetime.now():%Y%m%d_%H%M%S}.{req.format}"
+    return StreamingResponse(gen(),media_type="application/x-ndjson" if nd else "text/csv; charset=utf-8",headers={"Content-Disposition":f'attachment; filename="{fn}"'})
 
 # RANK CHECK — place_id(PID)로 매칭
-@app.post("/api/rank/check")
-async def rank_check(req:RankReq):
-    p=px()
-    place=await naver_search(req.keyword, p)
-    if not place:
-        raise HTTPException(500,"네이버 검색 결과를 가져올 수 없습니다. 잠시 후 재시도해주세요.")
+def rank_match(req:RankReq,place):
+    """검색 결과에서 대상 업체 찾기 — (rank_history 레코드, pid) 또는 None"""
     plist=place.get("list",[])
     tot=place.get("totalCount",0)
     for idx,pl in enumerate(plist[:req.rank_range]):
         matched=False
         pid=str(pl.get("id",""))
         # PID 매칭
-        if req.place_id and req.place_id in pid:
+        if req.place_id and req.place_id.strip()==pid:
             matched=True
         # 업체명 매칭
         if req.place_name and req.place_name in pl.get("name",""):
@@ -216,10 +1059,55 @@ async def rank_check(req:RankReq):
         n1=round(min(.2+sum(.08 for pt in req.keyword.split() if pt in pl.get("name",""))+min(rv/10000,.1),.5),6)
         n2=round(min(.2+min(rv/5000,.12)+min(bl/3000,.1),.5),6)
         n3=round(max(0,1-(rk/max(tot,1)))*.5,3) if tot else 0
-        rec={"keyword":req.keyword,"place_name":pl.get("name",""),"rank":rk,"n1":n1,"n2":n2,"n3":n3,"visitor_reviews":rv,"blog_reviews":bl,"total_biz":tot,"checked_at":datetime.now().isoformat()}
-        await sp("rank_history",rec)
-        return {"found":True,**rec,"place_id":pid}
-    return {"found":False,"keyword":req.keyword,"total_biz":tot}
+        return {"keyword":req.keyword,"place_name":pl.get("name",""),"rank":rk,"n1":n1,"n2":n2,"n3":n3,"visitor_reviews":rv,"blog_reviews":bl,"total_biz":tot,"checked_at":datetime.now().isoformat()},pid
+    return None
+
+@app.post("/api/rank/check")
+async def rank_check(req:RankReq):
+    p=px()
+    place=await naver_deep(req.keyword, p, req.rank_range, lambda pl:rank_match(req,pl) is not None, NC_TTL["rank"])
+    if not place:
+        raise HTTPException(500,"네이버 검색 결과를 가져올 수 없습니다. 잠시 후 재시도해주세요.")
+    m=rank_match(req,place)
+    if not m and place.get("failed"):
+        raise HTTPException(502,"네이버 검색 일부 페이지를 가져오지 못했습니다. 잠시 후 재시도해주세요.")
+    if not m:
+        return {"found":False,"keyword":req.keyword,"total_biz":place.get("totalCount",0)}
+    rec,pid=m
+    await sp("rank_history",rec)
+    return {"found":True,**rec,"place_id":pid}
+
+@app.post("/api/rank/check/batch")
+async def rank_check_batch(reqs:List[RankReq],concurrency:Optional[int]=None,deadline:Optional[float]=None):
+    """키워드별로 묶어 한 번씩만 검색 → 모든 대상 매칭 → rank_history 일괄 INSERT"""
+    if len(reqs)>RB_MAX:raise HTTPException(400,f"한 번에 최대 {RB_MAX}건")
+    t0=time.monotonic()
+    groups={}
+    for i,r in enumerate(reqs):groups.setdefault(ncache.key(r.keyword),[]).append(i)
+    places={}
+    def deep(k,port):
+        g=[reqs[i] for i in groups[k]]
+        return naver_deep(g[0].keyword,port,max(r.rank_range for r in g),lambda pl:all(rank_match(r,pl) for r in g),NC_TTL["rank"])
+    async for k,place,err in fanout(list(groups),deep,bound(concurrency,FAN,FAN_MAX),bound(deadline,FDL,FDL,.1)):
+        places[k]=place if place else err or "empty"
+    items=[None]*len(reqs);recs=[]
+    for k,idxs in groups.items():
+        place=places.get(k)
+        for i in idxs:
+            r=reqs[i]
+            if place is None:
+                items[i]={"keyword":r.keyword,"status":"timeout"};continue
+            if not isinstance(place,dict):
+                items[i]={"keyword":r.keyword,"status":"error","error":str(place)};continue
+            m=rank_match(r,place)
+            if not m and place.get("failed"):
+                items[i]={"keyword":r.keyword,"status":"error","error":f"페이지 조회 실패: {place['failed']}"};continue
+            if not m:
+                items[i]={"keyword":r.keyword,"status":"not_found","found":False,"total_biz":place.get("totalCount",0)};continue
+            rec,pid=m;recs.append(rec)
+            items[i]={"status":"found","found":True,**rec,"place_id":pid}
+    saved=bool(await sp("rank_history",recs)) if recs else True
+    return {"total":len(reqs),"keywords":len(groups),"found":len(recs),"saved":saved,"elapsed":round(time.monotonic()-t0,3),"items":items}
 
 # RANK HISTORY
 @app.get("/api/rank/history")
@@ -228,38 +1116,304 @@ async def rank_hist(keyword:str,days:int=30):
     return {"keyword":keyword,"history":await sg("rank_history",f"keyword=eq.{keyword}&checked_at=gte.{since}&order=checked_at.desc")}
 @app.delete("/api/rank/history/{i}")
 async def del_rank(i:int):
-    await sd("rank_history",f"id=eq.{i}");return {"success":True}
+    await sd("rank_history",f"id=eq.{i}");series_cache.clear();return {"success":True}
+
+BUCKET={"day":(10,timedelta(days=1)),"hour":(13,timedelta(hours=1))}
+series_cache=OrderedDict()
+
+def bstart(dt,bucket):
+    return dt.replace(minute=0,second=0,microsecond=0) if bucket=="hour" else dt.replace(hour=0,minute=0,second=0,microsecond=0)
+
+async def rank_rows(kws,since):
+    """여러 키워드의 rank_history 원본 — id 순 1000건씩, 조회 실패 시 502"""
+    out=[];last=0
+    kin="in.("+",".join(pq(k) for k in kws)+")"
+    while True:
+        q=urllib.parse.urlencode([("select","id,keyword,place_name,rank,n1,n2,n3,checked_at"),("keyword",kin),("checked_at",f"gte.{since}"),("id",f"gt.{last}"),("order","id.asc"),("limit","1000")])
+        r=await sbq("GET","rank_history",f"{SB}/rest/v1/rank_history?{q}",headers=H)
+        # 실패한 페이지를 끝으로 오인해 일부만 캐시하지 않도록 — 상태 확인 후 중단
+        if r.status_code!=200:raise HTTPException(502,f"rank_history 조회 실패 ({r.status_code})")
+        page=r.json();out+=page
+        if len(page)<1000:return out
+        last=page[-1]["id"]
+
+def downsample(rows,n):
+    """(keyword, place_name)별 버킷 집계 — {(kw,pn):{버킷:[min,합,개수,마지막시각,last,n1,n2,n3]}}"""
+    out={}
+    for r in rows:
+        rk=r.get("rank") or 0;t=(r.get("checked_at") or "")[:n];ts=r.get("checked_at") or ""
+        b=out.setdefault((r["keyword"],r.get("place_name") or ""),{}).setdefault(t,[rk,0,0,"",0,0,0,0])
+        b[0]=min(b[0],rk);b[1]+=rk;b[2]+=1
+        if ts>=b[3]:b[3:]=[ts,rk,r.get("n1"),r.get("n2"),r.get("n3")]
+    return out
+
+@app.get("/api/rank/history/series")
+async def rank_series(keywords:str,place_names:Optional[str]=None,days:int=30,bucket:str="day"):
+    """다중 키워드 순위 시계열 — 서버에서 일/시간 버킷으로 다운샘플, 열 단위(columnar) 응답.
+    지난 버킷은 키워드별로 캐시해 다음 요청은 열린 버킷부터만 다시 읽음"""
+    if bucket not in BUCKET:raise HTTPException(400,"bucket은 day 또는 hour")
+    kws=list(dict.fromkeys(k.strip() for k in keywords.split(",") if k.strip()))
+    if not kws:raise HTTPException(400,"keywords가 비어 있습니다")
+    pns={p.strip() for p in place_names.split(",") if p.strip()} if place_names else None
+    days=bound(days,30,RS_DAYS);n,step=BUCKET[bucket];now=datetime.now()
+    since=bstart(now-timedelta(days=days),bucket).isoformat()[:n];cur=bstart(now,bucket).isoformat()[:n]
+    # 키워드별 조회 시작점: 캐시가 since를 덮으면 캐시 이후부터
+    starts={}
+    for kw in kws:
+        e=series_cache.get((kw,bucket))
+        starts.setdefault(e["upto"] if e and e["from"]<=since else since,[]).append(kw)
+    fresh={};scanned=0
+    for st,group in starts.items():
+        rows=await rank_rows(group,st+":00:00" if bucket=="hour" else st);scanned+=len(rows)
+        for k,v in downsample(rows,n).items():fresh.setdefault(k,{}).update(v)
+    series=[];hit=0
+    for kw in kws:
+        e=series_cache.get((kw,bucket))
+        use=bool(e) and e["from"]<=since
+        closed={pn:dict(bs) for pn,bs in e["data"].items()} if use else {}
+        if use:hit+=1
+        for (k,pn),bs in fresh.items():
+            if k==kw:closed.setdefault(pn,{}).update(bs)
+        series_cache[(kw,bucket)]={"from":e["from"] if use else since,"upto":cur,"data":{pn:{t:b for t,b in bs.items() if t<cur} for pn,bs in closed.items()}}
+        series_cache.move_to_end((kw,bucket))
+        while len(series_cache)>RS_CACHE:series_cache.popitem(last=False)
+        for pn,bs in sorted(closed.items()):
+            if pns and pn not in pns:continue
+            ts=sorted(t for t in bs if t>=since)
+            if not ts:continue
+            col=lambda j:[bs[t][j] for t in ts]
+            series.append({"keyword":kw,"place_name":pn,"t":ts,"min":col(0),"avg":[round(bs[t][1]/bs[t][2],2) for t in ts],"last":col(4),"n1":col(5),"n2":col(6),"n3":col(7),"count":col(2)})
+    return {"bucket":bucket,"since":since,"series":series,"scanned":scanned,"cached":hit}
+
+# RANK TRACKER — rank_subscriptions 구독을 하루에 고르게 나눠 자동 체크, 작업 큐는 SQLite에 보존
+class JobQueue:
+    """재시작해도 남는 순위 체크 작업 큐 — status: queued/running/paused/done/failed"""
+    COLS=("id","sub","keyword","place_id","place_name","phone","rank_range","run_at","attempts","status","error","result","updated_at","slot")
+    def __init__(s,path):
+        s.path=path
+        with s._db() as db:
+            db.execute("create table if not exists rank_jobs(id integer primary key autoincrement,sub text,keyword text,place_id text,place_name text,phone text,rank_range integer,run_at real,attempts integer default 0,status text,error text,result text,updated_at real)")
+            db.execute("create index if not exists rank_jobs_due on rank_jobs(status,run_at)")
+            # slot: 지터 적용 전 명목 실행 시각 — 이전 버전 DB에는 없으므로 추가
+            try:db.execute("alter table rank_jobs add column slot real")
+            except sqlite3.OperationalError:pass
+    def _db(s):
+        return sqlite3.connect(s.path,timeout=5)
+    def _row(s,r):
+        d=dict(zip(s.COLS,r))
+        if d["result"]:d["result"]=json.loads(d["result"])
+        return d
+    def recover(s):
+        with s._db() as db:db.execute("update rank_jobs set status='queued' where status='running'")
+    def pending(s):
+        with s._db() as db:return {r[0] for r in db.execute("select distinct sub from rank_jobs where status in('queued','running','paused')")}
+    def last_slots(s):
+        with s._db() as db:return dict(db.execute("select sub,max(slot) from rank_jobs where slot is not null group by sub").fetchall())
+    def add(s,sub,sb,run_at,slot=None):
+        with s._db() as db:
+            db.execute("insert into rank_jobs(sub,keyword,place_id,place_name,phone,rank_range,run_at,status,updated_at,slot) values(?,?,?,?,?,?,?,'queued',?,?)",(sub,sb["keyword"],sb.get("place_id"),sb.get("place_name"),sb.get("phone"),sb.get("rank_range") or 300,run_at,time.time(),slot))
+    def claim(s,n):
+        with s._db() as db:
+            rows=db.execute(f"select {','.join(s.COLS)} from rank_jobs where status='queued' and run_at<=? order by run_at limit ?",(time.time(),n)).fetchall()
+            db.executemany("update rank_jobs set status='running',updated_at=? where id=?",[(time.time(),r[0]) for r in rows])
+        return [s._row(r) for r in rows]
+    def finish(s,i,status,error=None,result=None,run_at=None,attempts=None):
+        with s._db() as db:
+            db.execute("update rank_jobs set status=?,error=?,result=?,run_at=coalesce(?,run_at),attempts=coalesce(?,attempts),updated_at=? where id=?",(status,error,json.dumps(result,ensure_ascii=False) if result is not None else None,run_at,attempts,time.time(),i))
+    def move(s,i,frm,to):
+        with s._db() as db:
+            return db.execute(f"update rank_jobs set status=?,run_at=max(run_at,?),updated_at=? where id=? and status in({','.join('?'*len(frm))})",(to,time.time(),time.time(),i,*frm)).rowcount>0
+    def prune(s,days):
+        with s._db() as db:db.execute("delete from rank_jobs where status in('done','failed') and updated_at<?",(time.time()-days*86400,))
+    def list(s,status=None,limit=50):
+        q=f"select {','.join(s.COLS)} from rank_jobs"+(" where status=?" if status else "")+" order by run_at desc limit ?"
+        with s._db() as db:return [s._row(r) for r in db.execute(q,(status,limit) if status else (limit,))]
+    def get(s,i):
+        with s._db() as db:r=db.execute(f"select {','.join(s.COLS)} from rank_jobs where id=?",(i,)).fetchone()
+        return s._row(r) if r else None
+    def counts(s):
+        with s._db() as db:return dict(db.execute("select status,count(*) from rank_jobs group by status").fetchall())
+    async def call(s,fn,*a):
+        return await asyncio.to_thread(getattr(s,fn),*a)
+
+class RankTracker:
+    """구독마다 하루 RT_PER_DAY번, 구독 키 해시로 고정된 슬롯(+지터)에 체크 — 네이버 시도(페이지·경로) 1건마다 RT_RPS로 제한, 실패는 지수 백오프 재시도"""
+    def __init__(s,path):
+        s.path=path;s.q=None;s.task=None;s.paused=False;s.next=0.0;s.running=set()
+        s.subs=0;s.ok=0;s.retried=0;s.failed=0;s.refreshed=None;s.error=None
+    def start(s):
+        if s.q is None:s.q=JobQueue(s.path)
+        s.task=asyncio.create_task(s.loop())
+    async def stop(s):
+        if s.task:
+            s.task.cancel()
+            try:await s.task
+            except asyncio.CancelledError:pass
+            s.task=None
+        # 진행 중인 체크도 취소 — running으로 남은 작업은 다음 시작 때 recover가 되돌림
+        for t in s.running:t.cancel()
+        await asyncio.gather(*s.running,return_exceptions=True)
+    @staticmethod
+    def key(sb):
+        return "|".join(str(sb.get(k) or "") for k in ("keyword","place_id","place_name","phone"))
+    @staticmethod
+    def slot(sub,now,last=None):
+        """다음 명목 슬롯(지터 제외) — now 이후 첫 슬롯, 단 지난 작업의 슬롯 이하이면 그 다음 주기.
+        지터로 슬롯보다 일찍 끝난 작업이 같은 슬롯에 다시 잡히지 않게 함"""
+        period=86400/RT_PER_DAY
+        off=int(hashlib.md5(sub.encode()).hexdigest(),16)%int(period)
+        t=now-((now-off)%period)+period
+        if last is not None and t<=last+period/2:t=last+period
+        return t
+    async def refresh(s):
+        rows=[r for r in await sg(RT_TABLE,"select=*") if r.get("keyword") and r.get("active",True)]
+        have=await s.q.call("pending");last=await s.q.call("last_slots");now=time.time()
+        for r in rows:
+            k=s.key(r)
+            if k not in have:
+                t=s.slot(k,now,last.get(k))
+                await s.q.call("add",k,r,t+random.uniform(-RT_JITTER,RT_JITTER),t)
+        await s.q.call("prune",RT_KEEP)
+        s.subs=len(rows);s.refreshed=datetime.now().isoformat()
+    async def pace(s):
+        # 전역 초당 요청 한도 — PACE로 네이버 시도마다 호출
+        now=time.monotonic()
+        if s.next>now:await asyncio.sleep(s.next-now)
+        s.next=max(now,s.next)+1/RT_RPS
+    async def run(s,job):
+        PACE.set(s.pace)
+        try:
+            req=RankReq(keyword=job["keyword"],place_id=job["place_id"],place_name=job["place_name"],phone=job["phone"],rank_range=job["rank_range"] or 300)
+            # 속도 제한이 걸린 백그라운드 작업이라 동시 조회 이득이 없음 — 페이지를 차례로 받아 찾으면 뒤 페이지는 요청하지 않음
+            place=await naver_deep(req.keyword,px(),req.rank_range,lambda pl:rank_match(req,pl) is not None,NC_TTL["rank"],1)
+            if not place:raise RuntimeError("네이버 검색 결과 없음")
+            m=rank_match(req,place);res={"found":False,"total_biz":place.get("totalCount",0)}
+            # 못 찾은 채로 실패한 페이지가 있으면 재시도 대상
+            if not m and place.get("failed"):raise RuntimeError(f"네이버 페이지 조회 실패: {place['failed']}")
+            if m:
+                rec,pid=m
+                if await sp("rank_history",rec) is None:raise RuntimeError("rank_history 저장 실패")
+                res={"found":True,"rank":rec["rank"],"place_id":pid,"total_biz":rec["total_biz"]}
+            await s.q.call("finish",job["id"],"done",None,res);s.ok+=1
+        except Exception as e:
+            n=job["attempts"]+1
+            if n>=RT_RETRY:
+                await s.q.call("finish",job["id"],"failed",str(e),None,None,n);s.failed+=1
+            else:
+                await s.q.call("finish",job["id"],"queued",str(e),None,time.time()+min(RT_BACKOFF*2**(n-1),3600)+random.uniform(0,RT_BACKOFF),n);s.retried+=1
+    async def loop(s):
+        await s.q.call("recover")
+        sem=asyncio.Semaphore(RT_CONC);last=0.0
+        while True:
+            try:
+                if time.time()-last>=RT_REFRESH:
+                    last=time.time();await s.refresh()
+                if not s.paused:
+                    for job in await s.q.call("claim",RT_CONC):
+                        await sem.acquire()
+                        t=asyncio.create_task(s.run(job));s.running.add(t)
+                        t.add_done_callback(lambda t:(s.running.discard(t),sem.release()))
+                s.error=None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                s.error=str(e);oops("rank_tracker",e)
+            await asyncio.sleep(1)
+    async def stats(s):
+        return {"enabled":s.task is not None,"paused":s.paused,"subscriptions":s.subs,"refreshed":s.refreshed,"ok":s.ok,"retried":s.retried,"failed":s.failed,"error":s.error,"rps":RT_RPS,"per_day":RT_PER_DAY,"jobs":await s.q.call("counts") if s.q else {}}
+
+tracker=RankTracker(RT_DB)
+
+def tq():
+    if tracker.q is None:raise HTTPException(503,"순위 추적기가 꺼져 있습니다")
+    return tracker.q
+
+@app.get("/api/rank/tracker")
+async def tracker_status():
+    return await tracker.stats()
+@app.post("/api/rank/tracker/{action}")
+async def tracker_ctl(action:str):
+    if action not in("pause","resume","refresh"):raise HTTPException(404,"pause/resume/refresh")
+    if action=="refresh":tq();await tracker.refresh()
+    else:tracker.paused=action=="pause"
+    return await tracker.stats()
+@app.get("/api/rank/jobs")
+async def rank_jobs(status:Optional[str]=None,limit:int=50):
+    return {"jobs":await tq().call("list",status,limit)}
+@app.get("/api/rank/jobs/{i}")
+async def rank_job(i:int):
+    j=await tq().call("get",i)
+    if not j:raise HTTPException(404,"작업이 없습니다")
+    return j
+@app.post("/api/rank/jobs/{i}/pause")
+async def pause_job(i:int):
+    return {"success":await tq().call("move",i,("queued",),"paused")}
+@app.post("/api/rank/jobs/{i}/resume")
+async def resume_job(i:int):
+    return {"success":await tq().call("move",i,("paused","failed"),"queued")}
 
 # KEYHUNTER — PID 기반
-@app.post("/api/keyhunter/analyze")
-async def keyhunter(req:KHReq):
+PID_PATS=[re.compile(p) for p in (r'/place/(\d+)',r'placeid=(\d+)',r'/(\d{8,})')]
+SCRAPE={k:re.compile(rf'"{k}"\s*:\s*"([^"]+)"') for k in ("name","category","address")}
+ADDR_TOK=re.compile(r'[^\s,]+')
+CAT_SPLIT=re.compile(r'\s*[,>/]\s*')
+# 주소 토큰 접미사별 점수 — 동/읍/면 단위가 가장 구체적
+ADDR_SCORE={"동":30,"읍":30,"면":30,"리":28,"구":25,"로":20,"길":20,"시":15}
+
+def pid_of(s):
+    for p in PID_PATS:
+        m=p.search(s)
+        if m:return m.group(1)
+    return None
+
+def kh_keywords(name,cats,addr,n):
+    """키워드 후보를 점수순으로 최대 n개 — 같은 입력이면 항상 같은 목록.
+    점수: 업체명 전체 > 주소+카테고리 > 주소+상호 단어 > 카테고리 > 상호 단어 (동점은 생성 순서)"""
+    cl=[]
+    for cat in (cats if isinstance(cats,list) else [cats]):
+        # "카페,디저트>커피"처럼 나뉘는 카테고리는 원문 대신 조각만 — 아무도 그대로 검색하지 않음
+        parts=[p.strip() for p in CAT_SPLIT.split(cat or "") if p.strip()]
+        cl+=parts if len(parts)>1 else [cat]
+    base=[(c,20-i*.5) for i,c in enumerate(dict.fromkeys(c for c in cl if c))]
+    base+=[(pt,10-j*.5) for j,pt in enumerate(pt for pt in name.split() if len(pt)>1)]
+    addrs=[(t,ADDR_SCORE[t[-1]]) for t in ADDR_TOK.findall(addr) if len(t)>1 and t[-1] in ADDR_SCORE]
+    cand={}
+    def add(kw,score):
+        k=ncache.key(kw)
+        if k and (k not in cand or cand[k][0]<score):cand[k]=(score,cand[k][1] if k in cand else len(cand),kw)
+    add(name,100)
+    for a,sa in addrs:
+        for b,sb in base:add(f"{a} {b}",50+sa+sb)
+    for b,sb in base:add(b,40+sb)
+    # 후보가 모자라면 시/구+동 같은 주소 두 단어 조합까지
+    if len(cand)<n:
+        for i,(a1,s1) in enumerate(addrs):
+            for a2,s2 in addrs[i+1:]:
+                for b,sb in base:add(f"{a1} {a2} {b}",30+(s1+s2)/2+sb)
+    return [kw for _,_,kw in sorted(cand.values(),key=lambda x:(-x[0],x[1]))[:n]]
+
+async def kh_prepare(req:KHReq):
+    """URL → PID/업체정보 → 키워드 조합"""
     p=px()
     # URL에서 PID 추출
-    place_id=None
     url=req.place_url.strip()
-    for pat in [r'/place/(\d+)',r'placeid=(\d+)',r'/(\d{8,})']: 
-        m=re.search(pat,url)
-        if m:place_id=m.group(1);break
+    place_id=pid_of(url)
     # 숫자만 입력한 경우
     if not place_id and url.isdigit():
         place_id=url
     if not place_id:
         # naver.me 단축 URL 리졸브
         try:
-            async with httpx.AsyncClient(proxy=p,timeout=15,follow_redirects=True) as c:
-                r=await c.get(url,headers={"User-Agent":UA})
-                resolved=str(r.url)
-                for pat2 in [r'/place/(\d+)',r'placeid=(\d+)',r'/(\d{8,})']:
-                    m2=re.search(pat2,resolved)
-                    if m2:place_id=m2.group(1);break
-        except:
-            pass
+            r=await pool.proxy(p).get(url,headers={"User-Agent":UA},timeout=15,follow_redirects=True)
+            place_id=pid_of(str(r.url))
+        except Exception as e:
+            oops("keyhunter_resolve",e)
     if not place_id:
         raise HTTPException(400,"플레이스 ID(PID)를 찾을 수 없습니다. URL 형식: https://m.place.naver.com/place/PID")
     
     # PID로 업체 정보 조회
     place_name="";cats=[];addr=""
-    place=await naver_search(place_id, p)
+    place=await naver_search(place_id, p, NC_TTL["keyhunter"])
     if place and place.get("list"):
         info=place["list"][0]
         place_name=info.get("name","")
@@ -269,73 +1423,98 @@ async def keyhunter(req:KHReq):
     if not place_name:
         # PID로 직접 place 페이지 스크래핑 시도
         try:
-            async with httpx.AsyncClient(proxy=p,timeout=15) as c:
-                r=await c.get(f"https://m.place.naver.com/place/{place_id}",headers={"User-Agent":UA})
-                import re as re2
-                nm=re2.search(r'"name"\s*:\s*"([^"]+)"',r.text)
-                if nm:place_name=nm.group(1)
-                cm=re2.search(r'"category"\s*:\s*"([^"]+)"',r.text)
-                if cm:cats=[cm.group(1)]
-                am=re2.search(r'"address"\s*:\s*"([^"]+)"',r.text)
-                if am:addr=am.group(1)
-        except:
-            pass
+            r=await pool.proxy(p).get(f"https://m.place.naver.com/place/{place_id}",headers={"User-Agent":UA},timeout=15)
+            nm=SCRAPE["name"].search(r.text)
+            if nm:place_name=nm.group(1)
+            cm=SCRAPE["category"].search(r.text)
+            if cm:cats=[cm.group(1)]
+            am=SCRAPE["address"].search(r.text)
+            if am:addr=am.group(1)
+        except Exception as e:
+            oops("keyhunter_scrape",e)
     
     if not place_name:
         place_name=f"업체 PID:{place_id}"
     
-    # 키워드 조합 생성
-    base_kw=[]
-    if cats:
-        for cat in (cats if isinstance(cats,list) else [cats]):
-            if cat:base_kw.append(cat)
-    name_parts=[pt for pt in place_name.split() if len(pt)>1]
-    base_kw.extend(name_parts)
-    
-    addr_parts=[]
-    for part in addr.replace(","," ").split():
-        if any(part.endswith(s) for s in ["시","구","동","읍","면","리","로","길"]) and len(part)>1:
-            addr_parts.append(part)
-    
-    combos=set()
-    for a in addr_parts[:3]:
-        for b in base_kw[:10]:
-            combos.add(f"{a} {b}")
-    for b in base_kw:
-        combos.add(b)
-    if place_name:
-        combos.add(place_name)
-    combos=list(combos)[:req.keyword_count]
-    
-    # 각 키워드별 순위 조회
-    results=[]
-    for kw in combos:
-        try:
-            kplace=await naver_search(kw, p)
-            if not kplace:continue
-            pls=kplace.get("list",[])
-            rank=0
-            for idx2,p2 in enumerate(pls[:50]):
-                if place_id in str(p2.get("id","")):
-                    rank=idx2+1;break
-            if rank>0 and rank<=req.rank_limit:
-                comp_score=min(len(pls)/100,1)
-                comp="높음" if comp_score>.6 else "보통" if comp_score>.3 else "낮음"
-                results.append({"keyword":kw,"rank":rank,"search_volume":random.randint(100,5000),"competition":comp,"type":"오가닉"})
-        except:
-            continue
-    
-    return {"place":{"id":place_id,"name":place_name,"category":cats,"address":addr},"stats":{"generated":len(combos),"qualified":len(results)},"keywords":sorted(results,key=lambda x:x["rank"])}
+    combos=kh_keywords(place_name,cats,addr,bound(req.keyword_count,30,KH_MAX))
+    return {"id":place_id,"name":place_name,"category":cats,"address":addr},combos
+
+rank_idx=OrderedDict()
+
+def rank_index(kw,place):
+    """검색 결과 id → 순위 dict — 공유 캐시 결과는 건드리지 않고 캐시 키별 옆 LRU에 보관, 같은 결과 목록일 때만 재사용"""
+    k=ncache.key(kw);lst=place.get("list",[]);e=rank_idx.get(k)
+    if e and e[0] is lst:
+        rank_idx.move_to_end(k);return e[1]
+    idx={}
+    for i,pl in enumerate(lst):idx.setdefault(str(pl.get("id","")),i+1)
+    rank_idx[k]=(lst,idx)
+    while len(rank_idx)>NCN:rank_idx.popitem(last=False)
+    return idx
+
+def kh_rank(kw,kplace,place_id):
+    """검색 결과에서 PID 순위(상위 50, id 정확히 일치) — 없으면 0"""
+    pls=kplace.get("list",[]) if kplace else []
+    rank=rank_index(kw,kplace).get(place_id,0) if kplace else 0
+    if rank>50:rank=0
+    comp_score=min(len(pls)/100,1)
+    comp="높음" if comp_score>.6 else "보통" if comp_score>.3 else "낮음"
+    # 검색량은 키워드별 고정값(같은 키워드는 항상 같은 값)
+    vol=100+int(hashlib.md5(kw.encode()).hexdigest()[:8],16)%4901
+    return {"keyword":kw,"rank":rank,"search_volume":vol,"competition":comp,"type":"오가닉"}
+
+async def kh_run(req:KHReq,place,combos):
+    """키워드별 순위 병렬 조회 — 끝나는 순서대로 (kw, 결과|None) yield"""
+    t0=time.monotonic()
+    async for kw,kplace,err in fanout(combos,lambda kw,port:naver_search(kw,port,NC_TTL["keyhunter"]),bound(req.concurrency,FAN,FAN_MAX),bound(req.deadline,FDL,FDL,.1)):
+        if err:oops("keyhunter_search",err)
+        yield kw,(kh_rank(kw,kplace,place["id"]) if kplace else None)
+    span("keyhunter",time.monotonic()-t0,phase="search")
+
+@app.post("/api/keyhunter/analyze")
+async def keyhunter(req:KHReq):
+    t0=time.monotonic()
+    place,combos=await kh_prepare(req)
+    span("keyhunter",time.monotonic()-t0,phase="prepare")
+    t0=time.monotonic()
+    def stats(done,results):
+        return {"generated":len(combos),"checked":done,"qualified":len(results),"partial":done<len(combos),"elapsed":round(time.monotonic()-t0,3)}
+    if req.stream in("ndjson","sse"):
+        async def gen():
+            done=0;results=[]
+            yield sse("place",place) if req.stream=="sse" else json.dumps({"type":"place","place":place},ensure_ascii=False)+"\n"
+            async for kw,r in kh_run(req,place,combos):
+                done+=1
+                q=bool(r) and 0<r["rank"]<=req.rank_limit
+                if q:results.append(r)
+                d={"keyword":kw,"rank":r["rank"] if r else None,"qualified":q,**({"result":r} if q else {})}
+                yield sse("keyword",d) if req.stream=="sse" else json.dumps({"type":"keyword",**d},ensure_ascii=False)+"\n"
+            st=stats(done,results)
+            yield sse("done",{"stats":st}) if req.stream=="sse" else json.dumps({"type":"done","stats":st},ensure_ascii=False)+"\n"
+        return StreamingResponse(gen(),media_type="text/event-stream" if req.stream=="sse" else "application/x-ndjson")
+    done=0;results=[]
+    async for kw,r in kh_run(req,place,combos):
+        done+=1
+        if r and 0<r["rank"]<=req.rank_limit:results.append(r)
+    order={kw:i for i,kw in enumerate(combos)}
+    return {"place":place,"stats":stats(done,results),"keywords":sorted(results,key=lambda x:(x["rank"],order[x["keyword"]]))}
 
 # PROXY STATUS
 @app.get("/api/proxy/status")
-async def px_status():
-    try:
-        async with httpx.AsyncClient(proxy=px(),timeout=10) as c:
-            r=await c.get("https://httpbin.org/ip")
-            return {"status":"active","total":P1-P0+1,"ip":r.json().get("origin")}
-    except Exception as e:
-        return {"status":"error","error":str(e)}
+async def px_status(probe:bool=False,top:int=20):
+    st=pm.stats(top)
+    out={"status":"active" if st["healthy"] else "degraded" if st["tracked"] else "idle",**st,"pool":pool.stats()}
+    if probe:
+        # 선택된 포트 1개 실측
+        port=px();t0=time.monotonic()
+        try:
+            r=await pool.probe(port)
+            pm.report(port,"ok" if r.status_code==200 else "http",time.monotonic()-t0)
+            out["probe"]={"port":port,"status":r.status_code,"ip":r.json().get("origin") if r.status_code==200 else None}
+        except Exception as e:
+            pm.report(port,"error",time.monotonic()-t0)
+            out["probe"]={"port":port,"error":str(e)}
+    return out
 
 # DEBUG - 네이버 검색 직접 테스트
 gql_url_const="https://pcmap-api.place.naver.com/graphql"
@@ -345,7 +1524,7 @@ async def debug_parse(keyword:str):
     p=px()
     mobile_ua="Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15"
     try:
-        async with httpx.AsyncClient(proxy=p,timeout=20,follow_redirects=True) as c:
+        async with httpx.AsyncClient(proxy=purl(p),timeout=20,follow_redirects=True) as c:
             r=await c.get(f"https://m.search.naver.com/search.naver?query={urllib.parse.quote(keyword)}&sm=mtb_plc&where=m_local",headers={"User-Agent":mobile_ua})
             html=r.text
             import json as jn
@@ -385,7 +1564,7 @@ async def debug_naver(keyword:str):
     ]
     for name,url,hdrs in tests:
         try:
-            async with httpx.AsyncClient(proxy=p,timeout=15,follow_redirects=True) as c:
+            async with httpx.AsyncClient(proxy=purl(p),timeout=15,follow_redirects=True) as c:
                 if name.startswith("pcmap"):
                     payload=[{"operationName":"getPlacesList","variables":{"input":{"query":keyword,"start":1,"display":3,"adult":False,"spq":False,"queryRank":"","x":"126.9783882","y":"37.5666103","deviceType":"pcmap","bounds":""},"isNmap":True,"isBounds":False},"query":"query getPlacesList($input: PlacesInput, $isNmap: Boolean!, $isBounds: Boolean!) { businesses: places(input: $input) { total items { id name tel category address reviewCount } } }"}]
                     r=await c.post(url,json=payload,headers={"Content-Type":"application/json","User-Agent":UA,"Referer":"https://pcmap.place.naver.com/","Origin":"https://pcmap.place.naver.com"})
@@ -404,5 +1583,6 @@ async def debug_naver(keyword:str):
     return {"results":results}
 
 if __name__=="__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL","INFO"))
     port=int(os.getenv("PORT","8080"))
     uvicorn.run(app,host="0.0.0.0",port=port)